@@ -7,226 +7,129 @@ import plotly.express as px
 import plotly.graph_objects as go
 import pandas as pd
 import folium as fl
-import inflection
 import streamlit as st
 from PIL import Image
-from streamlit_folium import folium_static
-from folium.plugins import MarkerCluster
+from streamlit_folium import st_folium
 import streamlit.components.v1 as components
+from zomato import column_values, geo_index, load_dataset, queries, select_rows, view_layer
+from zomato.profiling import stage
+from zomato.ui import debug_panel, download_sidebar, page_run
 from millify import millify as mil
 
 
 st.set_page_config (page_title="Visão Geral", page_icon='❄', layout='wide') 
 
-# ==============================================================================
-# IMPORTAR DATASETS 
-# ==============================================================================
+# Mede as etapas desta execução (painel de diagnóstico com ?debug=1 na URL)
+with page_run('visao_geral') as execucao:
+    # ==============================================================================
+    # IMPORTAR DATASETS 
+    # ==============================================================================
 
-df = pd.read_csv("datasets/zomato.csv")
+    # DataFrame já tratado, construído uma vez por processo e compartilhado entre as sessões
+    dataset = load_dataset()
+    df = dataset.df
 
-# ==============================================================================
-# FUNÇÕES 
-# ==============================================================================
+    # ==============================================================================
+    # BARRA LATERAL - SIDEBAR
+    # ==============================================================================
 
-# Renomear as colunas do DataFrame
-def rename_columns(dataframe):
-    df = dataframe.copy()
-    title = lambda x: inflection.titleize(x)
-    snakecase = lambda x: inflection.underscore(x)
-    spaces = lambda x: x.replace(" ", "")
-    cols_old = list(df.columns)
-    cols_old = list(map(title, cols_old))
-    cols_old = list(map(spaces, cols_old))
-    cols_new = list(map(snakecase, cols_old))
-    df.columns = cols_new
-    return df
-df = rename_columns(df)
-
-# Preenchimento do nome dos países
-COUNTRIES = {
-1: "India",
-14: "Australia",
-30: "Brazil",
-37: "Canada",
-94: "Indonesia",
-148: "New Zeland",
-162: "Philippines",
-166: "Qatar",
-184: "Singapure",
-189: "South Africa",
-191: "Sri Lanka",
-208: "Turkey",
-214: "United Arab Emirates",
-215: "England",
-216: "United States of America",
-
-}
-def country_name(df):
-  country_code = df['country_code']
-  return COUNTRIES.get(country_code)
-df['country'] = df.apply(country_name, axis=1)
-
-# Criação do Tipo de Categoria de Comida
-def create_price_type(df):
-  price_range = df['price_range']
-  if price_range == 1:
-    return "cheap"
-  elif price_range == 2:
-    return "normal"
-  elif price_range == 3:
-    return "expensive"
-  else:
-    return "gourmet"
-df['price_type'] = df.apply(create_price_type, axis=1)
-
-
-# Criação do nome das Cores
-COLORS = {
-"3F7E00": "darkgreen",
-"5BA829": "green",
-"9ACD32": "lightgreen",
-"CDD614": "orange",
-"FFBA00": "red",
-"CBCBC8": "darkred",
-"FF7800": "magenta",
-}
-
-def color_name(df):
-  rating_color = df['rating_color']
-  return COLORS.get(rating_color)
-df['color_name'] = df.apply(color_name, axis=1)
-
-# Retirar os nan e nulos
-def nan_nulo(df, columns_to_check):
-    for column in columns_to_check:
-        df = df.loc[df[column].notnull(), :]
-    return df
-
-# Linhas e colunas nulas
-linhas_nulas = df.isnull().any(axis=1)
-colunas_nulas = df.isnull().sum()
-colunas_nan_none = df.isna().any()
-df = df.dropna(axis=0, how="any", inplace=False)
-df = df.dropna(axis=1, how="any", inplace=False)
-
-# Duplicadas
-df = df.drop_duplicates()
-
-# Ordenação das culinarias
-df["cuisines"] = df.loc[:, "cuisines"].astype(str).apply(lambda x: x.split(",")[0])
-
-# Ordenar restaurantes pelo registro
-df = df.sort_values(by='restaurant_id')
-
-# Deletar as culinarias mineira e drinks
-df = df.drop(df[df['cuisines'].isin(['Mineira', 'Drinks Only'])].index)
+    image = Image.open ('logotipo.png')
+    st.sidebar.image(image, width=120)
 
-# ==============================================================================
-# BARRA LATERAL - SIDEBAR
-# ==============================================================================
+    st.sidebar.markdown(' ### Zomato: Food Delivery & Dining ')
+    st.sidebar.markdown(' ### For the love of Food ')
+    st.sidebar.markdown("""---""")
 
-image = Image.open ('logotipo.png')
-st.sidebar.image(image, width=120)
+    st.sidebar.markdown('## Qual seria a data limite?')
 
-st.sidebar.markdown(' ### Zomato: Food Delivery & Dining ')
-st.sidebar.markdown(' ### For the love of Food ')
-st.sidebar.markdown("""---""")
+    paises = st.sidebar.multiselect('Escolha os países que Deseja visualizar dos restaurantes', 
+                                    column_values(dataset, 'country'),
+                                    default=column_values(dataset, 'country'))
 
-st.sidebar.markdown('## Qual seria a data limite?')
+    # Aplicando o filtro de países (bitmaps pré-calculados; sem cópia quando todos estão selecionados)
+    df = select_rows(dataset, country=paises)
 
-paises = st.sidebar.multiselect('Escolha os países que Deseja visualizar dos restaurantes', 
-                                df.loc[:, "country"].unique().tolist(),   
-                                default=df.loc[:, "country"].unique().tolist())
+    # O arquivo só é gerado quando o usuário pede, e fica em cache por seleção de países
+    download_sidebar(dataset, paises)
 
-# Aplicando o filtro de países
-linhas_selec = df['country'].isin(paises)
-df = df.loc[linhas_selec, :]
+    with st.sidebar.expander('Busca por proximidade'):
+        busca_ativa = st.checkbox('Buscar restaurantes próximos')
+        busca_lat = st.number_input('Latitude', -90.0, 90.0, 28.6139, format='%.4f')
+        busca_lon = st.number_input('Longitude', -180.0, 180.0, 77.2090, format='%.4f')
+        busca_modo = st.radio('Critério', ['Mais próximos', 'Dentro do raio'], horizontal=True)
+        busca_k = st.slider('Quantidade de restaurantes', 1, 50, 10)
+        busca_raio = st.slider('Raio (km)', 1, 100, 5)
+        busca_culinarias = st.multiselect('Culinárias', queries.served_cuisines(dataset, paises))
+        busca_precos = st.multiselect('Tipos de preço', ['cheap', 'normal', 'expensive', 'gourmet'])
 
-with st.sidebar:
+    st.sidebar.markdown('''---''')
 
-    st.sidebar.markdown('## Dados Tratados')
-    
-    csv = df.to_csv(index=False)
-    st.download_button(
-        label="Download",
-        data=df.to_csv(index=False, sep=";"),
-        file_name='d.csv',
-        mime='text/csv')
-
-st.sidebar.markdown('''---''')
-
-st.sidebar.markdown('### Powered by Alexadrerss© 🌎🎓📊') 
-with st.sidebar:
-    components.html("""
-                    <div class="badge-base LI-profile-badge" data-locale="en_US" data-size="large" data-theme="light" data-type="VERTICAL" data-vanity="alexandrerss" data-version="v1"><a class="badge-base__link LI-simple-link" href=https://www.linkedin.com/in/alexandrerss/"></a></div>
-                    <script src="https://platform.linkedin.com/badges/js/profile.js" async defer type="text/javascript"></script>              
-              """, height= 310)
+    st.sidebar.markdown('### Powered by Alexadrerss© 🌎🎓📊') 
+    with st.sidebar:
+        components.html("""
+                        <div class="badge-base LI-profile-badge" data-locale="en_US" data-size="large" data-theme="light" data-type="VERTICAL" data-vanity="alexandrerss" data-version="v1"><a class="badge-base__link LI-simple-link" href=https://www.linkedin.com/in/alexandrerss/"></a></div>
+                        <script src="https://platform.linkedin.com/badges/js/profile.js" async defer type="text/javascript"></script>              
+                  """, height= 310)
 
-# ==============================================================================
-# LAYOUT DA PAGINA
-# ==============================================================================
+    # ==============================================================================
+    # LAYOUT DA PAGINA
+    # ==============================================================================
 
-st.header('Zomato: Food Delivery & Dining')
+    st.header('Zomato: Food Delivery & Dining')
 
-st.markdown('''
-            A Zomato é um serviço de busca de restaurantes para quem quer sair para jantar, 
-            buscar comida ou pedir em casa na Índia, Brasil, Portugal, Turquia, Indonésia, Nova Zelândia, 
-            Itália, Filipinas, África do Sul, Sri Lanka, Catar, Emirados Árabes Unidos, Reino Unido, Estados Unidos, Austrália e Canadá. 
-            ''')
+    st.markdown('''
+                A Zomato é um serviço de busca de restaurantes para quem quer sair para jantar, 
+                buscar comida ou pedir em casa na Índia, Brasil, Portugal, Turquia, Indonésia, Nova Zelândia, 
+                Itália, Filipinas, África do Sul, Sri Lanka, Catar, Emirados Árabes Unidos, Reino Unido, Estados Unidos, Austrália e Canadá. 
+                ''')
 
-st.markdown('### Temos as seguintes marcas dentro da nossa plataforma:')
+    st.markdown('### Temos as seguintes marcas dentro da nossa plataforma:')
 
-with st.container():
-    col1, col2,col3,col4,col5 = st.columns(5)
+    # Totais da API de consultas (zomato.queries), em cache por seleção de países;
+    # as culinárias contam todas as servidas, não só a principal de cada restaurante
+    resumo = queries.overview(dataset, paises)
+
+    with st.container():
+        col1, col2,col3,col4,col5 = st.columns(5)
     
-    with col1:
-        unico = len(df.loc[:,'restaurant_id'].unique())
-        col1.metric("Restaurantes", unico)
+        with col1:
+            col1.metric("Restaurantes", resumo['restaurants'])
         
-    with col2:
-        paises = df.loc[:,'country'].nunique()
-        col2.metric("Países", paises)
+        with col2:
+            col2.metric("Países", resumo['countries'])
         
-    with col3:
-        cidades = df.loc[:,'city'].nunique()
-        col3.metric("Cidades", cidades)
+        with col3:
+            col3.metric("Cidades", resumo['cities'])
         
-    with col4:
-        avaliacoes = df.loc[:,'votes'].sum()
-        col4.metric("Avaliações", mil(avaliacoes, precision= 2))
+        with col4:
+            col4.metric("Avaliações", mil(resumo['votes'], precision= 2))
         
-    with col5:
-        culinaria = df.loc[:,'cuisines'].nunique()
-        col5.metric("Tipos de Culinárias", culinaria)  
+        with col5:
+            col5.metric("Tipos de Culinárias", resumo['cuisines'])  
         
 
-mapa = fl.Map()
-
-marcadores = MarkerCluster().add_to(mapa)
-
-for index, valor in df.iterrows():
-
-    latitude = valor ['latitude']
-    longitude = valor ['longitude']
-    cozinha = valor['cuisines']
-    price_for_two = valor["average_cost_for_two"]
-    moeda = valor["currency"]
-    rating = valor['aggregate_rating']
-    color = f'{valor["color_name"]}'
-    nome = valor["restaurant_name"]
-    
-    html = "<p><strong>{}</strong></p>"
-    html += "<p>Preço: {},00 ({}) para dois"
-    html += "<br />Culinária: {}"
-    html += "<br />Avaliação: {}/5.0"
-    html = html.format(nome, price_for_two, moeda, cozinha, rating)
-    
-    popup = fl.Popup(fl.Html(html, script=True),max_width=500)
-     
-    fl.Marker(location = [latitude, longitude],
-    popup = popup,
-    icon=fl.Icon(color=color, icon="home", prefix="fa")
-    ).add_to(marcadores)
-
-folium_static(mapa,width=1024, height=768)
-
+    # O mapa base não muda; só a camada com a área visível (células agregadas ou
+    # restaurantes) é trocada quando o usuário move o mapa ou muda o zoom
+    visao = st.session_state.get('mapa_visao', {})
+    camada = view_layer(dataset, df, paises, visao.get('zoom'), visao.get('bounds'))
+
+    mapa = fl.Map(location=[20, 0], zoom_start=2)
+    with stage('render-map', step='st_folium'):
+        saida = st_folium(mapa, key='mapa', feature_group_to_add=camada, width=1024, height=768,
+                          returned_objects=['zoom', 'bounds'])
+
+    if saida and {'zoom': saida.get('zoom'), 'bounds': saida.get('bounds')} != visao:
+        st.session_state['mapa_visao'] = {'zoom': saida.get('zoom'), 'bounds': saida.get('bounds')}
+        st.experimental_rerun()
+
+    if busca_ativa:
+        indice = geo_index(dataset)
+        if busca_modo == 'Mais próximos':
+            st.markdown(f'### {busca_k} restaurantes mais próximos')
+            proximos = indice.nearest(busca_lat, busca_lon, busca_k, busca_culinarias, busca_precos, paises)
+        else:
+            st.markdown(f'### Restaurantes a até {busca_raio} km')
+            proximos = indice.within(busca_lat, busca_lon, busca_raio, busca_culinarias, busca_precos, paises)
+        st.dataframe(proximos, use_container_width=True)
+
+debug_panel(execucao, dataset)
@@ -0,0 +1,17 @@
+from zomato.cube import AggregateCube, aggregate_cube, cuisine_cube
+from zomato.cuisines import CuisineIndex, cuisine_index
+from zomato.currency import COST_UNITS, RateTable, load_rates
+from zomato.distinct import distinct_count
+from zomato.enrich import COLORS, COUNTRIES, register_enrichment
+from zomato.etl import Dataset, build_dataset
+from zomato.export import export_bytes, iter_export
+from zomato.figures import FigureCache, cached_figure, figure_cache
+from zomato.filters import FilterIndex, column_values, filter_index, select_rows
+from zomato.geo import GeoIndex, geo_index
+from zomato.loader import load_data, load_dataset
+from zomato.maps import view_layer
+from zomato.ranking import top_per_cuisine, top_restaurants
+from zomato.schema import SCHEMA, apply_schema, memory_report
+from zomato.search import SearchIndex, search_index, search_restaurants
+from zomato.snapshot import load_or_build, write_snapshot
+from zomato.spatial import GridIndex, grid_index
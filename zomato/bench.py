@@ -0,0 +1,336 @@
+# ==============================================================================
+# BENCHMARK DAS PÁGINAS
+# ==============================================================================
+#
+# Executa cada página do dashboard sem navegador, pelo ScriptRunner do próprio
+# Streamlit (o mesmo mecanismo do streamlit.testing), sobre bases sintéticas de
+# 10 mil, 100 mil e 1 milhão de linhas (zomato.synthetic). Para cada página
+# mede:
+#
+#   - cold start: primeira execução em um processo novo (imports, carga do
+#     snapshot, índices);
+#   - rerun: nova execução sem mudar nada e uma execução por mudança de widget;
+#   - pico de memória (RSS) do processo;
+#   - tamanho das mensagens enviadas ao navegador em cada execução.
+#
+# Cada página roda em um subprocesso próprio, para que o cold start e o pico
+# de memória não sejam contaminados pelas páginas anteriores. O resultado é
+# um JSON, para comparar versões.
+#
+# Uso:  python -m zomato.bench [--rows 10000 100000] [--output bench.json]
+
+import argparse
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+import pandas as pd
+
+from zomato.synthetic import write_csv
+
+
+ROOT = Path(__file__).resolve().parent.parent
+
+ROWS = [10_000, 100_000, 1_000_000]
+
+PAGES = ["1_visao_geral.py", "pages/2_visao_paises.py",
+         "pages/3_visao_cidades.py", "pages/4_visao_restaurantes.py"]
+
+SEED = 42
+
+# Tempo máximo de uma execução de página
+TIMEOUT = 600
+
+COUNTRIES_LABEL = "Escolha os países que Deseja visualizar dos restaurantes"
+
+# Área visível do mapa da Visão Geral: zoom além do índice espacial sobre o
+# Atlântico Sul, onde não há restaurantes (camada de marcadores vazia)
+EMPTY_MAP_VIEW = {"zoom": 15, "bounds": {"_southWest": {"lat": -30.05, "lng": -20.05},
+                                         "_northEast": {"lat": -29.95, "lng": -19.95}}}
+
+
+# ==============================================================================
+# BASES SINTÉTICAS
+# ==============================================================================
+
+def prepare_dataset(rows, workdir, seed=SEED):
+    """CSV sintético (reaproveitado se já existir) + snapshot, com os tempos."""
+    from zomato.snapshot import load_or_build
+
+    path = Path(workdir) / f"zomato_{rows}_{seed}.csv"
+    start = time.perf_counter()
+    if not path.exists():
+        write_csv(path, rows, seed=seed)
+    generate_s = time.perf_counter() - start
+
+    start = time.perf_counter()
+    load_or_build(path)
+    build_s = time.perf_counter() - start
+    return path, {"rows": rows, "csv_bytes": path.stat().st_size,
+                  "generate_s": round(generate_s, 4), "build_s": round(build_s, 4)}
+
+
+# ==============================================================================
+# EXECUÇÃO DAS PÁGINAS SEM NAVEGADOR
+# ==============================================================================
+
+def _headless_runtime():
+    """Runtime falso, suficiente para o ScriptRunner (como no streamlit.testing)."""
+    from unittest.mock import MagicMock
+
+    from streamlit import config
+    from streamlit.runtime import Runtime
+    from streamlit.runtime.caching.storage.dummy_cache_storage import MemoryCacheStorageManager
+    from streamlit.runtime.media_file_manager import MediaFileManager
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+
+    runtime = MagicMock(spec=Runtime)
+    runtime.media_file_mgr = MediaFileManager(MemoryMediaFileStorage("/mock/media"))
+    runtime.cache_storage_manager = MemoryCacheStorageManager()
+    Runtime._instance = runtime
+    config.set_option("runner.postScriptGC", False)
+
+
+class PageSession:
+    """Uma sessão de usuário em uma página: executa o script e altera widgets."""
+
+    def __init__(self, script_path):
+        self.script_path = str(script_path)
+        self.session_state = None
+        self.widgets = {}
+
+    def run(self, widget_states=None):
+        """Executa a página (incluindo reruns pedidos pelo script).
+
+        Devolve tempo, bytes enviados, quantidade de mensagens e erros.
+        """
+        from streamlit.runtime.scriptrunner import RerunData
+        from streamlit.testing.local_script_runner import LocalScriptRunner
+
+        runner = LocalScriptRunner(self.script_path, self.session_state)
+        start = time.perf_counter()
+        runner.request_rerun(RerunData(widget_states=widget_states))
+        runner.start()
+        runner._script_thread.join(TIMEOUT)
+        seconds = time.perf_counter() - start
+        if runner._script_thread.is_alive():
+            runner.request_stop()
+            raise RuntimeError(f"{self.script_path}: execução passou de {TIMEOUT}s")
+
+        self.session_state = runner.session_state
+        messages = runner.forward_msgs()
+        errors = []
+        for msg in messages:
+            if not msg.HasField("delta") or msg.delta.WhichOneof("type") != "new_element":
+                continue
+            element = msg.delta.new_element
+            kind = element.WhichOneof("type")
+            if kind == "exception":
+                errors.append(element.exception.message)
+            elif hasattr(getattr(element, kind), "label") and hasattr(getattr(element, kind), "id"):
+                widget = getattr(element, kind)
+                self.widgets[widget.label] = (kind, widget)
+        return {"seconds": round(seconds, 4),
+                "payload_bytes": sum(msg.ByteSize() for msg in messages),
+                "messages": len(messages),
+                "errors": errors}
+
+    def change(self, label, value):
+        """Executa a página como se o usuário tivesse mudado o widget ``label``."""
+        from streamlit.proto.WidgetStates_pb2 import WidgetStates
+
+        kind, widget = self.widgets[label]
+        states = WidgetStates()
+        for state in self.session_state.get_widget_states():
+            if state.id != widget.id:
+                states.widgets.append(state)
+        states.widgets.append(_widget_state(kind, widget, value))
+        return self.run(states)
+
+    def set_state(self, key, value):
+        """Executa a página com ``session_state[key] = value`` (estado que não é de widget)."""
+        self.session_state[key] = value
+        return self.run(_all_states(self))
+
+
+class State:
+    """Interação que muda uma chave do session_state em vez de um widget."""
+
+    def __init__(self, key):
+        self.key = key
+
+
+def _widget_state(kind, widget, value):
+    from streamlit.proto.WidgetStates_pb2 import WidgetState
+
+    state = WidgetState(id=widget.id)
+    if kind == "multiselect":
+        state.int_array_value.data[:] = value(list(widget.options))
+    elif kind in ("selectbox", "radio"):
+        state.int_value = value
+    elif kind == "slider":
+        state.double_array_value.data[:] = [value]
+    elif kind == "number_input":
+        state.double_value = value
+    elif kind == "checkbox":
+        state.bool_value = value
+    elif kind == "text_input":
+        state.string_value = value
+    elif kind == "button":
+        state.trigger_value = True
+    else:
+        raise ValueError(f"Widget não suportado no benchmark: {kind}")
+    return state
+
+
+def first(n):
+    """Seleção de multiselect com as ``n`` primeiras opções."""
+    return lambda options: list(range(min(n, len(options))))
+
+
+# Mudanças de widget simuladas em cada página, em sequência na mesma sessão
+INTERACTIONS = {
+    "1_visao_geral.py": [
+        ("países", COUNTRIES_LABEL, first(3)),
+        ("busca", "Buscar restaurantes próximos", True),
+        ("busca raio", "Critério", 1),
+        ("raio", "Raio (km)", 50),
+        ("formato", "Formato do arquivo", 1),
+        ("mapa vazio", State("mapa_visao"), EMPTY_MAP_VIEW),
+        ("mapa sem países", COUNTRIES_LABEL, first(0)),
+    ],
+    "pages/2_visao_paises.py": [
+        ("países", COUNTRIES_LABEL, first(3)),
+        ("unidade", "Unidade dos preços", 1),
+        ("formato", "Formato do arquivo", 1),
+        ("download", "Preparar download", True),
+    ],
+    "pages/3_visao_cidades.py": [
+        ("países", COUNTRIES_LABEL, first(3)),
+        ("formato", "Formato do arquivo", 1),
+        ("download", "Preparar download", True),
+    ],
+    "pages/4_visao_restaurantes.py": [
+        ("países", COUNTRIES_LABEL, first(3)),
+        ("quantidade", "Selecione a quantidade de Restaurantes que deseja visualizar", 5),
+        ("culinárias", "Escolha os Tipos de Culinária", first(10)),
+        ("busca", "Nome, bairro ou endereço do restaurante", "pizza"),
+        ("unidade", "Unidade dos preços", 1),
+        ("formato", "Formato do arquivo", 1),
+    ],
+}
+
+
+def peak_rss_mb():
+    # VmHWM é zerado no exec; o ru_maxrss herdaria o pico do processo pai
+    try:
+        with open("/proc/self/status") as status:
+            for line in status:
+                if line.startswith("VmHWM:"):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except OSError:
+        pass
+    # ru_maxrss vem em KB no Linux e em bytes no macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return round(peak / (1024 * 1024 if sys.platform == "darwin" else 1024), 1)
+
+
+def bench_page(page):
+    """Mede uma página neste processo (chamado no subprocesso de cada página)."""
+    _headless_runtime()
+    if str(ROOT) not in sys.path:
+        sys.path.insert(0, str(ROOT))  # como o `streamlit run` faz com a pasta do app
+
+    session = PageSession(ROOT / page)
+    cold = session.run()
+    rerun = session.run(_all_states(session))
+    interactions = []
+    for name, label, value in INTERACTIONS.get(page, []):
+        if isinstance(label, State):
+            interactions.append({"name": name, **session.set_state(label.key, value)})
+            continue
+        if label not in session.widgets:
+            interactions.append({"name": name, "error": "widget não encontrado"})
+            continue
+        interactions.append({"name": name, **session.change(label, value)})
+
+    return {"page": page, "cold_start": cold, "rerun": rerun,
+            "interactions": interactions, "peak_rss_mb": peak_rss_mb()}
+
+
+def _all_states(session):
+    from streamlit.proto.WidgetStates_pb2 import WidgetStates
+
+    states = WidgetStates()
+    states.widgets.extend(session.session_state.get_widget_states())
+    return states
+
+
+def run_page(page, csv_path):
+    """Roda ``bench_page`` em um processo novo, apontado para ``csv_path``."""
+    env = dict(os.environ, ZOMATO_CSV=str(csv_path))
+    result = subprocess.run([sys.executable, "-m", "zomato.bench", "--page", page],
+                            cwd=ROOT, env=env, capture_output=True, text=True, timeout=TIMEOUT * 10)
+    if result.returncode != 0:
+        return {"page": page, "error": result.stderr.strip().splitlines()[-1:]}
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def _revision():
+    try:
+        return subprocess.run(["git", "rev-parse", "--short", "HEAD"], cwd=ROOT,
+                              capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run(rows=ROWS, pages=PAGES, workdir=None, seed=SEED):
+    """Benchmark completo: uma base sintética por tamanho, todas as páginas."""
+    import streamlit
+
+    report = {"revision": _revision(),
+              "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+              "python": platform.python_version(),
+              "pandas": pd.__version__,
+              "streamlit": streamlit.__version__,
+              "datasets": []}
+    with tempfile.TemporaryDirectory() as tmp:
+        workdir = Path(workdir or tmp)
+        workdir.mkdir(parents=True, exist_ok=True)
+        for n in rows:
+            path, info = prepare_dataset(n, workdir, seed)
+            info["pages"] = [run_page(page, path) for page in pages]
+            report["datasets"].append(info)
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark das páginas do dashboard.")
+    parser.add_argument("--rows", type=int, nargs="+", default=ROWS, help="tamanhos das bases sintéticas")
+    parser.add_argument("--pages", nargs="+", default=PAGES, help="páginas a medir")
+    parser.add_argument("--workdir", help="pasta para guardar (e reaproveitar) as bases sintéticas")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--output", help="arquivo JSON de saída (padrão: stdout)")
+    parser.add_argument("--page", help=argparse.SUPPRESS)  # modo subprocesso
+    args = parser.parse_args(argv)
+
+    if args.page:
+        print(json.dumps(bench_page(args.page)))
+        return
+
+    report = run(args.rows, args.pages, args.workdir, args.seed)
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text, encoding="utf-8")
+    else:
+        print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+# ==============================================================================
+# CUBO DE AGREGADOS POR PAÍS / CIDADE / CULINÁRIA / TIPO DE PREÇO
+# ==============================================================================
+#
+# As páginas Visão Países e Visão Cidades faziam vários groupby sobre as linhas
+# a cada rerun. O cubo é calculado uma vez por versão do dataset, com medidas
+# aditivas (contagens e somas) por combinação de dimensões; cada gráfico é um
+# "roll-up" do cubo para as dimensões de que precisa, filtrado pelos países
+# selecionados, sem voltar às linhas.
+#
+# ``cuisine_cube`` é o mesmo cubo sobre os pares (restaurante, culinária) de
+# zomato.cuisines: um restaurante conta em todas as culinárias que serve. Os
+# roll-ups por culinária saem dele; os demais, do cubo normal.
+
+import numpy as np
+
+from zomato.cuisines import cuisine_index
+from zomato.distinct import distinct_count
+from zomato.profiling import timed
+
+
+DIMENSIONS = ['country', 'city', 'cuisines', 'price_type']
+SOURCE_COLUMNS = DIMENSIONS + ['restaurant_id', 'votes', 'average_cost_for_two', 'cost_for_two_usd',
+                               'aggregate_rating']
+
+# Faixas de nota usadas na Visão Cidades
+GOOD_RATING = 4
+BAD_RATING = 2.5
+
+
+class AggregateCube:
+    """Medidas aditivas por (country, city, cuisines, price_type).
+
+    Colunas do cubo: ``rows`` (linhas), ``restaurants`` (restaurant_id
+    distintos), ``votes_sum``, ``cost_sum``, ``cost_usd_cents`` e
+    ``priced_rows`` (soma em centavos de dólar e linhas com taxa de câmbio),
+    ``rating_sum`` (em décimos, para a soma ser exata), ``good_ratings``
+    (nota >= 4) e ``bad_ratings`` (nota <= 2.5).
+    """
+
+    def __init__(self, df):
+        usd = df['cost_for_two_usd']
+        values = df[DIMENSIONS + ['restaurant_id', 'votes', 'average_cost_for_two']].assign(
+            usd_cents=(usd.fillna(0) * 100).round().astype('int64'),
+            priced=usd.notna(),
+            rating10=(df['aggregate_rating'] * 10).round().astype('int64'),
+            good=df['aggregate_rating'] >= GOOD_RATING,
+            bad=df['aggregate_rating'] <= BAD_RATING,
+        )
+        cells = values.groupby(DIMENSIONS, observed=True)
+        self.cells = cells.agg(
+            rows=('restaurant_id', 'size'),
+            restaurants=('restaurant_id', 'nunique'),
+            votes_sum=('votes', 'sum'),
+            cost_sum=('average_cost_for_two', 'sum'),
+            cost_usd_cents=('usd_cents', 'sum'),
+            priced_rows=('priced', 'sum'),
+            rating_sum=('rating10', 'sum'),
+            good_ratings=('good', 'sum'),
+            bad_ratings=('bad', 'sum'),
+        ).astype('int64').reset_index()
+
+        # Se cada restaurant_id cai em uma única célula, somar ``restaurants``
+        # no roll-up é exato; senão guardamos os ids de cada célula para unir
+        self.additive_restaurants = self.cells['restaurants'].sum() == df['restaurant_id'].nunique()
+        self.restaurant_ids = None
+        if not self.additive_restaurants:
+            self.restaurant_ids = cells['restaurant_id'].unique().reset_index(drop=True)
+
+    def _select(self, countries):
+        if countries is None:
+            return self.cells
+        return self.cells.loc[self.cells['country'].isin(countries)]
+
+    @timed("aggregate")
+    def rollup(self, by, countries=None, distinct=()):
+        """Soma as medidas do cubo agrupando por ``by`` (lista de dimensões).
+
+        ``distinct`` lista dimensões cujo número de valores distintos por grupo
+        também deve ser devolvido (ex.: cidades por país). As médias
+        ``votes_mean``, ``cost_mean``, ``cost_usd_mean`` e ``rating_mean`` são
+        derivadas das somas.
+        """
+        cells = self._select(countries)
+        grouped = cells.groupby(by, observed=True)
+        measures = ['rows', 'restaurants', 'votes_sum', 'cost_sum', 'cost_usd_cents', 'priced_rows',
+                    'rating_sum', 'good_ratings', 'bad_ratings']
+        result = grouped[measures].sum()
+
+        if not self.additive_restaurants:
+            ids = self.restaurant_ids.loc[cells.index]
+            result['restaurants'] = ids.groupby([cells[d] for d in by], observed=True).agg(
+                lambda arrays: len(np.unique(np.concatenate(arrays.tolist()))))
+
+        for dimension in distinct:
+            result[dimension] = distinct_count(cells, by, dimension)
+
+        result['votes_mean'] = result['votes_sum'] / result['rows']
+        result['cost_mean'] = result['cost_sum'] / result['rows']
+        result['cost_usd_mean'] = result['cost_usd_cents'] / 100 / result['priced_rows']
+        result['rating_mean'] = result['rating_sum'] / 10 / result['rows']
+        return result
+
+
+def aggregate_cube(dataset):
+    """``AggregateCube`` do dataset, construído uma vez por versão."""
+    return dataset.derived("aggregate_cube", lambda d: AggregateCube(d.df))
+
+
+def cuisine_cube(dataset):
+    """``AggregateCube`` dos pares (restaurante, culinária), uma vez por versão."""
+    return dataset.derived(
+        "cuisine_cube", lambda d: AggregateCube(cuisine_index(d).explode(d.df, SOURCE_COLUMNS)))
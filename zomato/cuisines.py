@@ -0,0 +1,114 @@
+# ==============================================================================
+# CULINÁRIAS DE CADA RESTAURANTE (RESTAURANTE -> CULINÁRIA)
+# ==============================================================================
+#
+# A coluna cuisines guarda só a culinária principal (a primeira da lista); a
+# lista completa fica em all_cuisines ("Italian, Pizza, Cafe"). Aqui ela é
+# normalizada uma vez por versão do dataset:
+#
+#   - pares (linha, culinária) "explodidos", com a culinária como código
+#     inteiro. Cada combinação distinta de all_cuisines (uma categoria) é
+#     separada uma única vez, não uma vez por linha;
+#   - índice invertido culinária -> linhas, em formato CSR: as linhas da
+#     culinária ``c`` são ``postings[offsets[c]:offsets[c + 1]]``, ordenadas.
+#
+# "Todos os restaurantes que servem Japanese" vira uma fatia do índice, e as
+# agregações por culinária (zomato.cube.cuisine_cube, zomato.ranking) contam
+# todas as culinárias que o restaurante oferece, sem str.contains.
+
+import numpy as np
+import pandas as pd
+
+from zomato.etl import EXCLUDED_CUISINES
+
+
+def split_cuisines(value):
+    """Culinárias de um texto de all_cuisines, sem repetições, na ordem listada."""
+    names = (name.strip() for name in str(value).split(","))
+    return list(dict.fromkeys(name for name in names if name))
+
+
+class CuisineIndex:
+    """Pares (linha, culinária) + índice invertido culinária -> linhas.
+
+    ``cuisines`` são os nomes em ordem alfabética (o código de cada um é a
+    sua posição). ``row_positions``/``cuisine_codes`` são os pares, na ordem
+    das linhas. As culinárias de ``excluded`` ficam fora, como na análise.
+    """
+
+    def __init__(self, df, excluded=EXCLUDED_CUISINES):
+        self.n_rows = len(df)
+        combos = df['all_cuisines'].astype('category')
+        parsed = [[name for name in split_cuisines(combo) if name not in excluded]
+                  for combo in combos.cat.categories]
+        self.cuisines = sorted({name for names in parsed for name in names})
+        self.codes = {name: code for code, name in enumerate(self.cuisines)}
+
+        # Culinárias de cada combinação, também em CSR
+        lengths = np.array([len(names) for names in parsed] + [0], dtype='int64')
+        starts = np.concatenate([[0], np.cumsum(lengths)])
+        flat = np.array([self.codes[name] for names in parsed for name in names], dtype='int32')
+
+        # Nulos (código -1) apontam para a combinação vazia no fim
+        combo = combos.cat.codes.to_numpy().astype('int64')
+        combo[combo < 0] = len(parsed)
+        per_row = lengths[combo]
+        self.row_positions = np.repeat(np.arange(self.n_rows, dtype='int64'), per_row)
+        first_pair = np.repeat(np.cumsum(per_row) - per_row, per_row)
+        within = np.arange(len(self.row_positions)) - first_pair
+        self.cuisine_codes = flat[starts[combo][self.row_positions] + within]
+
+        order = np.argsort(self.cuisine_codes, kind='stable')
+        self.postings = self.row_positions[order]
+        self.offsets = np.concatenate([[0], np.cumsum(np.bincount(self.cuisine_codes, minlength=len(self.cuisines)))])
+        for array in (self.row_positions, self.cuisine_codes, self.postings):
+            array.setflags(write=False)
+
+    def positions(self, cuisines):
+        """Posições (ordenadas) das linhas que servem alguma das ``cuisines``."""
+        slices = [self.postings[self.offsets[code]:self.offsets[code + 1]]
+                  for code in (self.codes.get(name) for name in cuisines) if code is not None]
+        if len(slices) == 1:
+            return slices[0]
+        if not slices:
+            return np.empty(0, dtype='int64')
+        return np.flatnonzero(self.mask(cuisines))
+
+    def mask(self, cuisines):
+        """Máscara das linhas que servem alguma das ``cuisines``."""
+        mask = np.zeros(self.n_rows, dtype=bool)
+        for code in (self.codes.get(name) for name in cuisines):
+            if code is not None:
+                mask[self.postings[self.offsets[code]:self.offsets[code + 1]]] = True
+        return mask
+
+    def counts(self):
+        """Quantidade de restaurantes que servem cada culinária."""
+        return pd.Series(np.diff(self.offsets), index=pd.Index(self.cuisines, name='cuisines'), name='restaurants')
+
+    def served(self, positions=None):
+        """Culinárias servidas pelas linhas ``positions`` (todas, se None)."""
+        if positions is None:
+            return [name for name, count in zip(self.cuisines, np.diff(self.offsets)) if count]
+        selected = np.zeros(self.n_rows, dtype=bool)
+        selected[np.asarray(positions, dtype='int64')] = True
+        codes = np.unique(self.cuisine_codes[selected[self.row_positions]])
+        return [self.cuisines[code] for code in codes]
+
+    def in_order_of_appearance(self):
+        """Nomes na ordem em que aparecem na base (linha a linha, como listados)."""
+        first = np.unique(self.cuisine_codes, return_index=True)
+        return [self.cuisines[code] for code in first[0][np.argsort(first[1], kind='stable')]]
+
+    def explode(self, df, columns=None):
+        """Uma linha de ``df`` por par (restaurante, culinária), com ``cuisines``
+        trocada por cada culinária servida (categórica)."""
+        columns = [column for column in (columns or df.columns) if column != 'cuisines']
+        exploded = df[columns].take(self.row_positions).reset_index(drop=True)
+        exploded['cuisines'] = pd.Categorical.from_codes(self.cuisine_codes, self.cuisines)
+        return exploded
+
+
+def cuisine_index(dataset):
+    """``CuisineIndex`` do dataset, construído uma vez por versão."""
+    return dataset.derived("cuisine_index", lambda d: CuisineIndex(d.df))
@@ -0,0 +1,114 @@
+# ==============================================================================
+# CONVERSÃO DOS PREÇOS PARA DÓLAR
+# ==============================================================================
+#
+# average_cost_for_two vem na moeda local de cada restaurante (rúpias,
+# reais, libras...), então médias entre países não são comparáveis. A etapa
+# ``normalize_currency`` do pipeline adiciona cost_for_two_usd, calculada uma
+# vez na carga (e gravada no snapshot) com a tabela de taxas local e
+# versionada em datasets/currency_rates.json:
+#
+#   - ``currencies`` leva o texto da coluna currency ao código ISO;
+#   - ``countries`` corrige os rótulos ambíguos ou errados da base: "Dollar($)"
+#     é usado por Austrália, Canadá, Singapura e EUA, e as Filipinas aparecem
+#     como "Botswana Pula(P)" com valores em pesos;
+#   - ``usd_per_unit`` dá quantos dólares vale uma unidade de cada código.
+#
+# Restaurantes com moeda sem taxa ficam com cost_for_two_usd nulo e aparecem
+# no relatório da etapa. ZOMATO_RATES aponta para outra tabela.
+
+import json
+import os
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+
+RATES_PATH = Path(os.environ.get("ZOMATO_RATES")
+                  or Path(__file__).resolve().parent.parent / "datasets" / "currency_rates.json")
+
+# Casas decimais de cost_for_two_usd (centavos)
+USD_DECIMALS = 2
+
+# Unidades de preço oferecidas nas páginas: coluna das linhas, medida do cubo e formato
+COST_UNITS = {
+    "usd": {"label": "Dólar (US$)", "column": "cost_for_two_usd", "measure": "cost_usd_mean",
+            "format": "US$ {:,.2f}"},
+    "local": {"label": "Moeda local", "column": "average_cost_for_two", "measure": "cost_mean",
+              "format": "{}"},
+}
+
+
+def factorize_pairs(first, second):
+    """Código do par (first[i], second[i]) de cada linha + os pares distintos,
+    na ordem em que aparecem. Como o MultiIndex.factorize, mas também com
+    zero linhas (o do pandas falha com "Cannot infer number of levels")."""
+    first_codes, first_values = pd.factorize(first, use_na_sentinel=False)
+    second_codes, second_values = pd.factorize(second, use_na_sentinel=False)
+    width = max(len(second_values), 1)
+    codes, combined = pd.factorize(first_codes.astype("int64") * width + second_codes)
+    pairs = [(first_values[code // width], second_values[code % width]) for code in combined.tolist()]
+    return codes, pairs
+
+
+class RateTable:
+    """Tabela de taxas: versão + dólares por unidade de cada moeda."""
+
+    def __init__(self, version, usd_per_unit, currencies, countries=None):
+        self.version = version
+        self.usd_per_unit = usd_per_unit
+        self.currencies = currencies
+        self.countries = countries or {}
+
+    def usd(self, currency, country=None):
+        """Dólares por unidade de ``currency`` (no ``country``), ou NaN."""
+        code = self.countries.get(country) or self.currencies.get(currency)
+        return float(self.usd_per_unit.get(code, np.nan))
+
+    def _pairs(self, df):
+        # A taxa depende só do par (moeda, país): calcula uma vez por par distinto
+        codes, uniques = factorize_pairs(df["currency"], df["country"])
+        return codes, uniques, np.array([self.usd(*pair) for pair in uniques], dtype="float64")
+
+    def factors(self, df):
+        """Dólares por unidade de moeda de cada linha (NaN se não há taxa)."""
+        codes, _, factors = self._pairs(df)
+        return factors[codes]
+
+    def unknown(self, df):
+        """Moedas das linhas de ``df`` sem taxa na tabela."""
+        _, uniques, factors = self._pairs(df)
+        return sorted({currency for (currency, _), factor in zip(uniques, factors) if np.isnan(factor)})
+
+
+@lru_cache(maxsize=8)
+def _load(path, mtime_ns):
+    with open(path, encoding="utf-8") as f:
+        raw = json.load(f)
+    return RateTable(raw["version"], raw["usd_per_unit"], raw["currencies"], raw.get("countries"))
+
+
+def load_rates(path=RATES_PATH):
+    """``RateTable`` de ``path``, relida só quando o arquivo muda."""
+    path = Path(path)
+    return _load(str(path), path.stat().st_mtime_ns)
+
+
+def rates_version(path=RATES_PATH):
+    return load_rates(path).version
+
+
+def cost_in_usd(df, rates=None):
+    """cost_for_two_usd vetorizado: custo local x taxa da moeda da linha."""
+    rates = rates or load_rates()
+    usd = df["average_cost_for_two"].to_numpy(dtype="float64") * rates.factors(df)
+    return np.round(usd, USD_DECIMALS)
+
+
+# Etapa do pipeline: adiciona cost_for_two_usd
+def normalize_currency(df, rates=None):
+    rates = rates or load_rates()
+    df = df.assign(cost_for_two_usd=cost_in_usd(df, rates))
+    return df, {"rates_version": rates.version, "unknown_currencies": rates.unknown(df)}
@@ -0,0 +1,88 @@
+# ==============================================================================
+# CONTAGEM DE DISTINTOS POR GRUPO
+# ==============================================================================
+#
+# ``distinct_count`` conta os valores distintos de UMA coluna por grupo, em vez
+# de rodar groupby().nunique() sobre o DataFrame inteiro. O modo exato trabalha
+# só com códigos inteiros (categorias ou pd.factorize, que usa hash); o modo
+# aproximado usa HyperLogLog, com memória fixa por grupo, para bases grandes.
+
+import numpy as np
+import pandas as pd
+
+
+# 2^12 registradores por grupo: erro padrão de ~1.6%
+HLL_PRECISION = 12
+
+
+def _codes(column):
+    """Códigos inteiros da coluna; -1 marca nulos."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        return column.cat.codes.to_numpy().astype('int64'), len(column.cat.categories)
+    codes, uniques = pd.factorize(column)
+    return codes.astype('int64'), len(uniques)
+
+
+def _rho(words, bits):
+    """Posição do primeiro bit 1 (a partir do mais significativo) em ``bits`` bits."""
+    # Os 53 bits mais altos cabem exatamente em um float64, então frexp dá o bit_length
+    top = (words >> np.uint64(64 - 53)).astype('float64')
+    bit_length = np.frexp(top)[1]
+    rho = np.where(top > 0, 53 - bit_length + 1, bits + 1)
+    return np.minimum(rho, bits + 1).astype('uint8')
+
+
+def _hashes(column):
+    """Hash de 64 bits de cada valor (categorias são hasheadas uma vez só)."""
+    if isinstance(column.dtype, pd.CategoricalDtype):
+        categories = pd.util.hash_array(column.cat.categories.to_numpy())
+        return categories[column.cat.codes.to_numpy().clip(0)]
+    return pd.util.hash_array(column.to_numpy())
+
+
+def hll_registers(groups, n_groups, hashes, precision=HLL_PRECISION):
+    """Registradores HyperLogLog (n_groups x 2^precision) dos ``hashes``."""
+    index = (hashes >> np.uint64(64 - precision)).astype('int64')
+    rest = hashes << np.uint64(precision)
+    registers = np.zeros((n_groups, 1 << precision), dtype='uint8')
+    cells = groups.astype('int64') * (1 << precision) + index
+    maxima = pd.Series(_rho(rest, 64 - precision)).groupby(cells).max()
+    registers.ravel()[maxima.index.to_numpy()] = maxima.to_numpy()
+    return registers
+
+
+def hll_estimate(registers):
+    """Estimativa de cardinalidade para cada linha de registradores."""
+    m = registers.shape[1]
+    alpha = 0.7213 / (1 + 1.079 / m)
+    raw = alpha * m * m / np.power(2.0, -registers.astype('float64')).sum(axis=1)
+    zeros = (registers == 0).sum(axis=1)
+    small = (raw <= 2.5 * m) & (zeros > 0)
+    linear = m * np.log(m / np.maximum(zeros, 1))
+    return np.where(small, linear, raw)
+
+
+def distinct_count(df, by, column, approx=False, precision=HLL_PRECISION):
+    """Número de valores distintos (não nulos) de ``column`` por grupo de ``by``.
+
+    Equivale a ``df.groupby(by)[column].nunique()`` lendo apenas as colunas
+    necessárias. Com ``approx=True`` usa HyperLogLog.
+    """
+    by = [by] if isinstance(by, str) else list(by)
+    grouped = df[by].groupby(by, observed=True, sort=True)
+    groups = grouped.ngroup().to_numpy()
+    index = grouped.size().index
+    n_groups = len(index)
+
+    codes, n_values = _codes(df[column])
+    valid = (codes >= 0) & (groups >= 0)
+    groups, codes = groups[valid], codes[valid]
+
+    if approx:
+        hashes = _hashes(df[column])[valid]
+        counts = np.round(hll_estimate(hll_registers(groups, n_groups, hashes, precision))).astype('int64')
+    else:
+        pairs = np.unique(groups * max(n_values, 1) + codes)
+        counts = np.bincount(pairs // max(n_values, 1), minlength=n_groups)
+
+    return pd.Series(counts, index=index, name=column)
@@ -0,0 +1,92 @@
+# ==============================================================================
+# ENRIQUECIMENTO DAS COLUNAS
+# ==============================================================================
+#
+# As colunas derivadas são calculadas coluna a coluna (mapeamento por tabela e
+# np.select), sem df.apply(axis=1). Novas colunas podem ser registradas com
+# ``register_enrichment`` e passam a fazer parte do pipeline automaticamente.
+
+import numpy as np
+
+from zomato.profiling import stage
+
+
+# Preenchimento do nome dos países
+COUNTRIES = {
+    1: "India",
+    14: "Australia",
+    30: "Brazil",
+    37: "Canada",
+    94: "Indonesia",
+    148: "New Zeland",
+    162: "Philippines",
+    166: "Qatar",
+    184: "Singapure",
+    189: "South Africa",
+    191: "Sri Lanka",
+    208: "Turkey",
+    214: "United Arab Emirates",
+    215: "England",
+    216: "United States of America",
+}
+
+# Criação do nome das Cores
+COLORS = {
+    "3F7E00": "darkgreen",
+    "5BA829": "green",
+    "9ACD32": "lightgreen",
+    "CDD614": "orange",
+    "FFBA00": "red",
+    "CBCBC8": "darkred",
+    "FF7800": "darkred",
+}
+
+# Tipo de Categoria de Comida por faixa de preço (qualquer outra faixa é gourmet)
+PRICE_TYPES = {
+    1: "cheap",
+    2: "normal",
+    3: "expensive",
+}
+DEFAULT_PRICE_TYPE = "gourmet"
+
+
+ENRICHMENTS = {}
+
+
+def register_enrichment(name, func=None):
+    """Registra ``func(df) -> coluna`` para gerar a coluna ``name``.
+
+    Pode ser usado diretamente ou como decorador. As funções recebem o
+    DataFrame inteiro e devem devolver um Series/array do mesmo tamanho,
+    calculado de forma vetorizada. A ordem de registro é a ordem de execução,
+    então uma coluna pode depender de outra registrada antes.
+    """
+    if func is None:
+        return lambda f: register_enrichment(name, f)
+    ENRICHMENTS[name] = func
+    return func
+
+
+@register_enrichment("country")
+def country_name(df):
+    return df['country_code'].map(COUNTRIES)
+
+
+@register_enrichment("price_type")
+def create_price_type(df):
+    price_range = df['price_range'].to_numpy()
+    conditions = [price_range == code for code in PRICE_TYPES]
+    price_type = np.select(conditions, list(PRICE_TYPES.values()), default=DEFAULT_PRICE_TYPE)
+    return price_type.astype(object)
+
+
+@register_enrichment("color_name")
+def color_name(df):
+    return df['rating_color'].map(COLORS)
+
+
+def enrich(df):
+    for name, func in ENRICHMENTS.items():
+        with stage(f"enrich:{name}"):
+            df[name] = func(df)
+    return df
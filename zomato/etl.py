@@ -0,0 +1,220 @@
+# ==============================================================================
+# PIPELINE DE PREPARAÇÃO DOS DADOS
+# ==============================================================================
+#
+# Etapas que transformam o CSV bruto no DataFrame tratado usado pelas páginas.
+# O cache por processo fica em zomato.loader e o snapshot binário em
+# zomato.snapshot.
+
+import hashlib
+import os
+import threading
+from pathlib import Path
+
+import inflection
+import numpy as np
+import pandas as pd
+
+from zomato.currency import normalize_currency
+from zomato.enrich import enrich
+from zomato.profiling import stage
+from zomato.schema import apply_schema
+
+
+# ZOMATO_CSV aponta o app para outra base (ex.: as bases sintéticas do benchmark)
+CSV_PATH = Path(os.environ.get("ZOMATO_CSV") or Path(__file__).resolve().parent.parent / "datasets" / "zomato.csv")
+
+# Culinárias retiradas da análise
+EXCLUDED_CUISINES = ["Mineira", "Drinks Only"]
+
+# Qual versão fica quando o mesmo restaurant_id aparece mais de uma vez:
+# "latest" (a última do arquivo) ou "max_votes" (a mais votada; empate, a última)
+DEDUPE_POLICIES = ("latest", "max_votes")
+DEDUPE_POLICY = os.environ.get("ZOMATO_DEDUPE_POLICY") or "latest"
+
+
+class Dataset:
+    """DataFrame tratado + metadados da construção.
+
+    ``df`` é compartilhado entre todas as sessões: as páginas devem apenas
+    filtrar/ler, nunca alterar o frame no lugar. Índices e agregados
+    calculados a partir de ``df`` ficam memoizados em ``derived``
+    (``derived_state`` traz os já construídos, ex.: de zomato.shared).
+    ``source_key`` é o ``file_key`` do CSV tomado antes de lê-lo.
+    """
+
+    def __init__(self, df, version, source, timings, reports=None, derived_state=None, source_key=None):
+        self.df = df
+        self.version = version
+        self.source = source
+        self.source_key = source_key
+        self.timings = timings
+        self.reports = reports or {}
+        self._derived = dict(derived_state or {})
+        self._lock = threading.RLock()
+
+    def derived(self, name, builder):
+        """Constrói ``builder(self)`` uma única vez para esta versão do dataset."""
+        try:
+            return self._derived[name]
+        except KeyError:
+            pass
+        with self._lock:
+            if name not in self._derived:
+                with stage(f"derived:{name}") as record:
+                    self._derived[name] = builder(self)
+                self.timings[f"derived:{name}"] = record["seconds"]
+            return self._derived[name]
+
+    def derived_state(self):
+        """Índices e agregados já construídos, pelo nome."""
+        with self._lock:
+            return dict(self._derived)
+
+    def __repr__(self):
+        return f"Dataset(version={self.version!r}, rows={len(self.df)})"
+
+
+# ==============================================================================
+# ETAPAS
+# ==============================================================================
+
+# Renomear as colunas do DataFrame
+def rename_columns(dataframe):
+    df = dataframe.copy()
+    title = lambda x: inflection.titleize(x)
+    snakecase = lambda x: inflection.underscore(x)
+    spaces = lambda x: x.replace(" ", "")
+    cols_old = list(df.columns)
+    cols_old = list(map(title, cols_old))
+    cols_old = list(map(spaces, cols_old))
+    cols_new = list(map(snakecase, cols_old))
+    df.columns = cols_new
+    return df
+
+
+# Retirar os nan e nulos
+def clean(df):
+    df = df.dropna(axis=0, how="any", inplace=False)
+    return df.dropna(axis=1, how="any", inplace=False)
+
+
+def dedupe_mask(ids, votes=None, policy=DEDUPE_POLICY):
+    """Linhas mantidas (máscara) com um registro por id + motivos das descartadas.
+
+    Só usa os inteiros de ``ids`` e ``votes`` (tabela hash do pandas), em
+    tempo linear, sem comparar as colunas de texto.
+    """
+    if policy not in DEDUPE_POLICIES:
+        raise ValueError(f"Política de duplicadas desconhecida: {policy!r}")
+    ids = pd.Series(np.asarray(ids))
+    newest = ~ids.duplicated(keep="last").to_numpy()
+    if policy == "latest":
+        return newest, {"older": int((~newest).sum())}
+
+    votes = pd.Series(np.asarray(votes))
+    best = (votes == votes.groupby(ids.to_numpy()).transform("max")).to_numpy()
+    keep = np.zeros(len(ids), dtype=bool)
+    candidates = np.flatnonzero(best)
+    keep[candidates[~ids.iloc[candidates].duplicated(keep="last").to_numpy()]] = True
+    return keep, {"fewer_votes": int((~best).sum()), "older": int((best & ~keep).sum())}
+
+
+# Duplicadas: um registro por restaurant_id
+def dedupe(df, policy=DEDUPE_POLICY):
+    votes = df["votes"] if policy == "max_votes" else None
+    keep, reasons = dedupe_mask(df["restaurant_id"], votes, policy)
+    return df.loc[keep], {"policy": policy, "dropped": int((~keep).sum()), **reasons}
+
+
+# Culinárias: cuisines fica só com a primeira listada (a principal) e
+# all_cuisines com a lista completa, normalizada em zomato.cuisines
+def first_cuisine(df):
+    df["all_cuisines"] = df.loc[:, "cuisines"].astype(str)
+    df["cuisines"] = df.loc[:, "cuisines"].astype(str).apply(lambda x: x.split(",")[0])
+    return df
+
+
+# Deletar as culinarias mineira e drinks
+def exclude_cuisines(df):
+    return df.loc[~df['cuisines'].isin(EXCLUDED_CUISINES)]
+
+
+# Ordenar restaurantes pelo registro e deletar as culinarias mineira e drinks
+def sort_and_filter(df):
+    df = df.sort_values(by='restaurant_id')
+    df = exclude_cuisines(df)
+    return df.reset_index(drop=True)
+
+
+# Uma etapa devolve o DataFrame ou (DataFrame, relatório); os relatórios
+# ficam em Dataset.reports. As etapas fora de FRAME_STAGES valem linha a
+# linha (o resultado de uma linha não depende das outras) e a ingestão em
+# blocos (zomato.ingest) as roda bloco a bloco, na mesma ordem
+STAGES = [
+    ("rename", rename_columns),
+    ("enrich", enrich),
+    ("clean", clean),
+    ("dedupe", dedupe),
+    ("cuisines", first_cuisine),
+    ("currency", normalize_currency),
+    ("sort_filter", sort_and_filter),
+    ("schema", apply_schema),
+]
+
+# Etapas que precisam de todas as linhas juntas
+FRAME_STAGES = ("dedupe", "sort_filter", "schema")
+
+
+# ==============================================================================
+# CONSTRUÇÃO
+# ==============================================================================
+
+def file_key(path):
+    """Identifica o estado do arquivo no disco sem ler o conteúdo."""
+    stat = Path(path).stat()
+    return (str(Path(path).resolve()), stat.st_mtime_ns, stat.st_size)
+
+
+def file_version(path):
+    """Hash curto do conteúdo do arquivo (parte da versão do dataset)."""
+    digest = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            digest.update(chunk)
+    return digest.hexdigest()[:12]
+
+
+def dataset_version(content, reports):
+    """Versão do dataset: o hash do CSV + a tabela de câmbio e a política de
+    duplicadas usadas na construção (``reports``), que também mudam o
+    resultado. É a chave dos caches por dataset e dos ETags do serviço."""
+    return f"{content}-{reports['currency']['rates_version']}-{reports['dedupe']['policy']}"
+
+
+def build_dataset(path=CSV_PATH, policy=DEDUPE_POLICY):
+    """Executa o pipeline completo sobre ``path`` medindo o tempo de cada etapa.
+
+    ``policy`` é a política de duplicadas (padrão: ZOMATO_DEDUPE_POLICY).
+    """
+    timings = {}
+    reports = {}
+
+    # Estado e hash do arquivo antes da leitura: se o CSV mudar durante a
+    # construção, o snapshot fica marcado com o estado antigo e é refeito
+    key, content = file_key(path), file_version(path)
+    with stage("read_csv") as record:
+        df = pd.read_csv(path)
+    timings["read_csv"] = record["seconds"]
+
+    for name, func in STAGES:
+        if func is dedupe:
+            func = lambda df: dedupe(df, policy)
+        with stage(name) as record:
+            df = func(df)
+            if isinstance(df, tuple):
+                df, reports[name] = df
+                record.update(reports[name])
+        timings[name] = record["seconds"]
+
+    return Dataset(df, dataset_version(content, reports), str(path), timings, reports, source_key=key)
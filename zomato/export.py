@@ -0,0 +1,127 @@
+# ==============================================================================
+# EXPORTAÇÃO DOS DADOS TRATADOS
+# ==============================================================================
+#
+# O botão Download da barra lateral serializava o frame filtrado duas vezes a
+# cada rerun, mesmo sem ninguém clicar. Agora o arquivo só é gerado sob
+# demanda, em blocos de linhas (sem montar uma string gigante), e os bytes
+# ficam em cache por (versão do dataset, países, formato), compartilhados
+# entre as sessões.
+
+import gzip
+import io
+import threading
+from collections import OrderedDict
+
+from zomato.filters import select_rows
+from zomato.loader import is_stale, on_reload
+from zomato.profiling import stage
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:
+    pa = None
+
+
+# Linhas serializadas por bloco
+CHUNK_ROWS = 50_000
+
+# Limite de memória do cache de arquivos gerados
+CACHE_BYTES = 64 * 1024 * 1024
+
+FORMATS = {
+    "csv": {"label": "CSV", "file_name": "d.csv", "mime": "text/csv"},
+    "csv.gz": {"label": "CSV compactado (gzip)", "file_name": "d.csv.gz", "mime": "application/gzip"},
+    "parquet": {"label": "Parquet", "file_name": "d.parquet", "mime": "application/vnd.apache.parquet"},
+}
+
+
+def available_formats():
+    return [name for name in FORMATS if name != "parquet" or pa is not None]
+
+
+def iter_csv(df, sep=";", chunk_rows=CHUNK_ROWS):
+    """CSV em blocos de bytes: cabeçalho + ``chunk_rows`` linhas por bloco."""
+    yield df.iloc[:0].to_csv(index=False, sep=sep).encode()
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows].to_csv(index=False, sep=sep, header=False).encode()
+
+
+def iter_export(df, fmt="csv", chunk_rows=CHUNK_ROWS):
+    """Blocos de bytes do arquivo de ``df`` no formato ``fmt``."""
+    if fmt == "csv":
+        yield from iter_csv(df, chunk_rows=chunk_rows)
+    elif fmt == "csv.gz":
+        buffer = io.BytesIO()
+        with gzip.GzipFile(fileobj=buffer, mode="wb", mtime=0) as compressed:
+            for chunk in iter_csv(df, chunk_rows=chunk_rows):
+                compressed.write(chunk)
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate()
+        yield buffer.getvalue()
+    elif fmt == "parquet":
+        if pa is None:
+            raise ValueError("Exportar Parquet requer pyarrow")
+        buffer = io.BytesIO()
+        schema = pa.Schema.from_pandas(df, preserve_index=False)
+        with pq.ParquetWriter(buffer, schema, compression="zstd") as writer:
+            for start in range(0, len(df), chunk_rows):
+                part = df.iloc[start:start + chunk_rows]
+                writer.write_table(pa.Table.from_pandas(part, schema=schema, preserve_index=False))
+        yield buffer.getvalue()
+    else:
+        raise ValueError(f"Formato de exportação desconhecido: {fmt!r}")
+
+
+_cache = OrderedDict()
+_cache_bytes = 0
+_lock = threading.Lock()
+
+
+@on_reload
+def cache_clear():
+    """Esvazia o cache de arquivos (os gerados da versão anterior do dataset)."""
+    global _cache_bytes
+    with _lock:
+        _cache.clear()
+        _cache_bytes = 0
+
+
+def _key(dataset, countries, fmt):
+    return (dataset.version, None if countries is None else tuple(sorted(countries)), fmt)
+
+
+def cached_export(dataset, countries, fmt="csv"):
+    """Bytes já gerados para esta seleção, ou None."""
+    key = _key(dataset, countries, fmt)
+    with _lock:
+        data = _cache.get(key)
+        if data is not None:
+            _cache.move_to_end(key)
+        return data
+
+
+def export_bytes(dataset, countries, fmt="csv"):
+    """Gera (ou reaproveita do cache) o arquivo dos ``countries`` em ``fmt``."""
+    global _cache_bytes
+    data = cached_export(dataset, countries, fmt)
+    if data is not None:
+        return data
+
+    with stage("export", format=fmt):
+        df = dataset.df if countries is None else select_rows(dataset, country=countries)
+        data = b"".join(iter_export(df, fmt))
+    if is_stale(dataset):  # versão já substituída: não volta ao cache
+        return data
+
+    key = _key(dataset, countries, fmt)
+    with _lock:
+        if key not in _cache:
+            _cache[key] = data
+            _cache_bytes += len(data)
+        while _cache_bytes > CACHE_BYTES and len(_cache) > 1:
+            _, removed = _cache.popitem(last=False)
+            _cache_bytes -= len(removed)
+    return data
@@ -0,0 +1,94 @@
+# ==============================================================================
+# CACHE DE FIGURAS PLOTLY
+# ==============================================================================
+#
+# As figuras dos gráficos dependem só do gráfico, do estado dos filtros e da
+# versão do dataset. O JSON de cada figura é guardado em um cache LRU
+# compartilhado entre as sessões: dashboards iguais para usuários diferentes
+# custam uma consulta ao dicionário, sem refazer o px.bar nem serializar.
+
+import threading
+from collections import OrderedDict
+
+from zomato.loader import is_stale, on_reload
+from zomato.profiling import stage
+
+
+# Limites do cache: quantidade de figuras e memória total do JSON
+MAX_FIGURES = 512
+MAX_BYTES = 64 * 1024 * 1024
+
+
+def normalize_filters(filters):
+    """Chave estável para o estado dos filtros (listas viram tuplas ordenadas)."""
+    def normalize(value):
+        if isinstance(value, (list, tuple, set, frozenset)):
+            return tuple(sorted(normalize(item) for item in value))
+        if isinstance(value, dict):
+            return tuple(sorted((key, normalize(item)) for key, item in value.items()))
+        return value
+    return normalize(filters or {})
+
+
+class FigureCache:
+    """LRU de JSON de figuras limitado por quantidade e por bytes."""
+
+    def __init__(self, max_figures=MAX_FIGURES, max_bytes=MAX_BYTES):
+        self.max_figures = max_figures
+        self.max_bytes = max_bytes
+        self.size_bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self._figures = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key):
+        with self._lock:
+            spec = self._figures.get(key)
+            if spec is not None:
+                self._figures.move_to_end(key)
+                self.hits += 1
+            return spec
+
+    def put(self, key, spec):
+        with self._lock:
+            if key in self._figures:
+                return
+            self._figures[key] = spec
+            self.size_bytes += len(spec)
+            while len(self._figures) > 1 and (
+                    len(self._figures) > self.max_figures or self.size_bytes > self.max_bytes):
+                _, removed = self._figures.popitem(last=False)
+                self.size_bytes -= len(removed)
+
+    def figure_json(self, chart_id, filters, version, builder, stale=None):
+        """JSON da figura ``chart_id``; chama ``builder()`` só se não estiver em cache.
+
+        Com ``stale()`` verdadeiro depois do cálculo a figura não é guardada.
+        """
+        key = (chart_id, normalize_filters(filters), version)
+        spec = self.get(key)
+        if spec is None:
+            with self._lock:
+                self.misses += 1
+            with stage("render-chart", chart=chart_id):
+                spec = builder().to_json()
+            if stale is None or not stale():
+                self.put(key, spec)
+        return spec
+
+    def clear(self):
+        with self._lock:
+            self._figures.clear()
+            self.size_bytes = 0
+
+
+figure_cache = FigureCache()
+
+# As figuras da versão anterior do dataset não servem mais
+on_reload(figure_cache.clear)
+
+
+def cached_figure(dataset, chart_id, filters, builder):
+    """JSON da figura para a versão do ``dataset``, do cache global de figuras."""
+    return figure_cache.figure_json(chart_id, filters, dataset.version, builder, lambda: is_stale(dataset))
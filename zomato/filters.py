@@ -0,0 +1,156 @@
+# ==============================================================================
+# FILTROS POR BITMAP
+# ==============================================================================
+#
+# Para cada valor de country, cuisines, price_type e city é pré-calculado o
+# conjunto de linhas em que ele aparece: bitmap compactado (np.packbits) para
+# valores frequentes e lista de posições para valores raros, que ocupariam
+# bitmaps quase vazios. Uma seleção vira OR dos valores escolhidos e AND entre
+# colunas, e o resultado (posições das linhas) fica em cache por seleção.
+# Quando todos os valores de uma coluna estão selecionados ela nem entra na
+# conta; com tudo selecionado o filtro não custa nada e não copia o frame.
+#
+# cuisines usa a lista completa de culinárias (zomato.cuisines): escolher
+# Japanese seleciona todo restaurante que serve Japanese, não só os que a têm
+# como culinária principal.
+
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+
+from zomato.cuisines import CuisineIndex, cuisine_index
+from zomato.profiling import timed
+
+
+FILTER_COLUMNS = ('country', 'cuisines', 'price_type', 'city')
+
+# Valores com menos de 1/32 das linhas guardam posições em vez de bitmap
+DENSE_FRACTION = 1 / 32
+
+CACHE_SIZE = 128
+
+
+class FilterIndex:
+    """Bitmaps/listas de linhas por valor das colunas filtráveis."""
+
+    def __init__(self, df, columns=FILTER_COLUMNS, cuisines=None):
+        self.n_rows = len(df)
+        self.values = {}
+        self.dense = {}
+        self.sparse = {}
+        for column in columns:
+            if column == 'cuisines':
+                rows, codes, uniques = _cuisine_codes(cuisines or CuisineIndex(df))
+            else:
+                codes, uniques = _codes(df[column])
+                rows = np.arange(self.n_rows, dtype='int64')
+            self.values[column] = uniques
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            order = np.argsort(codes, kind='stable')
+            starts = np.concatenate([[0], np.cumsum(counts)]) + (codes < 0).sum()
+            dense, sparse = {}, {}
+            for code, value in enumerate(uniques):
+                positions = rows[order[starts[code]:starts[code + 1]]]
+                if counts[code] >= self.n_rows * DENSE_FRACTION:
+                    mask = np.zeros(self.n_rows, dtype=bool)
+                    mask[positions] = True
+                    dense[value] = np.packbits(mask)
+                else:
+                    sparse[value] = positions
+            self.dense[column], self.sparse[column] = dense, sparse
+
+        self._cache = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # O cache e o lock são do processo: não vão junto (zomato.shared)
+        state = dict(self.__dict__, _cache=OrderedDict())
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, _lock=threading.Lock())
+
+    def _column_mask(self, column, selected):
+        packed = np.zeros((self.n_rows + 7) // 8, dtype='uint8')
+        positions = []
+        for value in selected:
+            if value in self.dense[column]:
+                packed |= self.dense[column][value]
+            elif value in self.sparse[column]:
+                positions.append(self.sparse[column][value])
+        mask = np.unpackbits(packed, count=self.n_rows).astype(bool)
+        if positions:
+            mask[np.concatenate(positions)] = True
+        return mask
+
+    def _normalize(self, selections):
+        key = []
+        for column, selected in sorted(selections.items()):
+            if selected is None:
+                continue
+            selected = frozenset(selected)
+            if selected.issuperset(self.values[column]):
+                continue  # todos os valores: a coluna não restringe nada
+            key.append((column, selected))
+        return tuple(key)
+
+    def rows(self, **selections):
+        """Posições (ordenadas) das linhas que passam nos filtros, ou None para todas.
+
+        Ex.: ``rows(country=['Brazil', 'India'], price_type=['cheap'])``.
+        """
+        key = self._normalize(selections)
+        if not key:
+            return None
+        with self._lock:
+            if key in self._cache:
+                self._cache.move_to_end(key)
+                return self._cache[key]
+
+        mask = np.ones(self.n_rows, dtype=bool)
+        for column, selected in key:
+            mask &= self._column_mask(column, selected)
+        positions = np.flatnonzero(mask)
+        positions.setflags(write=False)
+
+        with self._lock:
+            self._cache[key] = positions
+            while len(self._cache) > CACHE_SIZE:
+                self._cache.popitem(last=False)
+        return positions
+
+
+def _codes(column):
+    """Códigos inteiros + valores distintos na ordem em que aparecem."""
+    codes, uniques = pd.factorize(column)
+    return codes, list(uniques)
+
+
+def _cuisine_codes(index):
+    """Pares (linha, código) de todas as culinárias servidas, valores na ordem em que aparecem."""
+    uniques = index.in_order_of_appearance()
+    recode = np.empty(len(index.cuisines), dtype='int64')
+    recode[[index.codes[name] for name in uniques]] = np.arange(len(uniques))
+    return index.row_positions, recode[index.cuisine_codes], uniques
+
+
+def filter_index(dataset):
+    """``FilterIndex`` do dataset, construído uma vez por versão."""
+    return dataset.derived("filter_index", lambda d: FilterIndex(d.df, cuisines=cuisine_index(d)))
+
+
+@timed("filter")
+def select_rows(dataset, **selections):
+    """DataFrame com as linhas selecionadas; o próprio ``dataset.df`` se nada filtra."""
+    positions = filter_index(dataset).rows(**selections)
+    if positions is None:
+        return dataset.df
+    return dataset.df.take(positions)
+
+
+def column_values(dataset, column):
+    """Valores distintos de ``column`` na ordem em que aparecem na base."""
+    return list(filter_index(dataset).values[column])
@@ -0,0 +1,132 @@
+# ==============================================================================
+# BUSCA GEOGRÁFICA: RAIO E VIZINHOS MAIS PRÓXIMOS
+# ==============================================================================
+#
+# Os restaurantes são ordenados por célula de uma grade de latitude/longitude.
+# Uma busca só calcula a distância (haversine) dos restaurantes nas células
+# que tocam o raio procurado, em vez de medir a distância até todas as linhas.
+# O filtro de culinárias considera todas as que o restaurante serve
+# (zomato.cuisines).
+
+import math
+
+import numpy as np
+from haversine import Unit, haversine_vector
+
+from zomato.cuisines import CuisineIndex, cuisine_index
+
+
+# Lado da célula da grade, em graus (~55 km no equador)
+CELL_DEGREES = 0.5
+
+KM_PER_DEGREE = 111.195
+
+RESULT_COLUMNS = ['restaurant_id', 'restaurant_name', 'country', 'city', 'cuisines',
+                  'price_type', 'average_cost_for_two', 'currency', 'cost_for_two_usd', 'aggregate_rating', 'votes']
+
+
+class GeoIndex:
+    """Grade de células com as linhas do DataFrame agrupadas por célula."""
+
+    def __init__(self, df, cell_degrees=CELL_DEGREES, cuisines=None):
+        self.df = df
+        self.cell_degrees = cell_degrees
+        self.lat = df['latitude'].to_numpy(dtype='float64')
+        self.lon = df['longitude'].to_numpy(dtype='float64')
+        self.cuisines = cuisines or CuisineIndex(df)
+
+        # Códigos das colunas usadas nos filtros, para filtrar sem comparar textos
+        self.codes = {}
+        for column in ('price_type', 'country'):
+            categorical = df[column].astype('category')
+            categories = {value: code for code, value in enumerate(categorical.cat.categories)}
+            self.codes[column] = (categorical.cat.codes.to_numpy(), categories)
+
+        iy = np.floor((self.lat + 90) / cell_degrees).astype('int64')
+        ix = np.floor((self.lon + 180) / cell_degrees).astype('int64')
+        self.columns = int(math.ceil(360 / cell_degrees))
+        cells = iy * self.columns + ix
+
+        # Linhas ordenadas por célula; cada célula é uma fatia contínua de ``order``
+        self.order = np.argsort(cells, kind='stable')
+        sorted_cells = cells[self.order]
+        self.cells, self.starts = np.unique(sorted_cells, return_index=True)
+        self.ends = np.append(self.starts[1:], len(sorted_cells))
+
+    def _candidates(self, lat, lon, radius_km):
+        """Posições das linhas nas células que podem estar dentro do raio."""
+        size = self.cell_degrees
+        dlat = radius_km / KM_PER_DEGREE
+        south, north = max(lat - dlat, -90), min(lat + dlat, 90)
+        cos_lat = math.cos(math.radians(max(abs(south), abs(north))))
+        dlon = radius_km / (KM_PER_DEGREE * cos_lat) if cos_lat > 1e-6 else 360
+        if dlon >= 180:
+            return np.arange(len(self.df))
+
+        rows = np.arange(int((south + 90) // size), int((north + 90) // size) + 1)
+        first = int(math.floor((lon - dlon + 180) / size))
+        last = int(math.floor((lon + dlon + 180) / size))
+        columns = np.arange(first, last + 1) % self.columns
+        wanted = np.unique(rows[:, None] * self.columns + columns[None, :])
+
+        found = np.searchsorted(self.cells, wanted)
+        inside = found < len(self.cells)
+        found = found[inside][self.cells[found[inside]] == wanted[inside]]
+        if len(found) == 0:
+            return np.empty(0, dtype='int64')
+        return np.concatenate([self.order[self.starts[i]:self.ends[i]] for i in found])
+
+    def _filter(self, positions, cuisines=None, price_types=None, countries=None):
+        # Culinárias e tipos de preço vazios não filtram (campos opcionais da
+        # busca); países seguem o select_rows: None = todos, lista vazia = nenhum
+        if cuisines:
+            positions = positions[self.cuisines.mask(cuisines)[positions]]
+        for column, values in (('price_type', price_types or None), ('country', countries)):
+            if values is not None:
+                codes, categories = self.codes[column]
+                wanted = [categories.get(value, -2) for value in values]
+                positions = positions[np.isin(codes[positions], wanted)]
+        return positions
+
+    def _distances(self, lat, lon, positions):
+        if len(positions) == 0:
+            return np.empty(0)
+        points = np.column_stack([self.lat[positions], self.lon[positions]])
+        return haversine_vector(np.array([[lat, lon]]), points, Unit.KILOMETERS, comb=True).ravel()
+
+    def _result(self, positions, distances):
+        result = self.df.iloc[positions][RESULT_COLUMNS].copy()
+        result['distance_km'] = distances.round(2)
+        return result.reset_index(drop=True)
+
+    def within(self, lat, lon, radius_km, cuisines=None, price_types=None, countries=None):
+        """Restaurantes a até ``radius_km`` do ponto, do mais perto ao mais longe."""
+        positions = self._filter(self._candidates(lat, lon, radius_km), cuisines, price_types, countries)
+        distances = self._distances(lat, lon, positions)
+        inside = distances <= radius_km
+        positions, distances = positions[inside], distances[inside]
+        order = np.argsort(distances, kind='stable')
+        return self._result(positions[order], distances[order])
+
+    def nearest(self, lat, lon, k=10, cuisines=None, price_types=None, countries=None):
+        """Os ``k`` restaurantes mais próximos do ponto.
+
+        O raio começa em uma célula e dobra até existirem ``k`` restaurantes
+        dentro dele (ou até cobrir a base inteira); só então os resultados são
+        garantidamente os mais próximos.
+        """
+        radius_km = self.cell_degrees * KM_PER_DEGREE
+        while True:
+            candidates = self._candidates(lat, lon, radius_km)
+            positions = self._filter(candidates, cuisines, price_types, countries)
+            distances = self._distances(lat, lon, positions)
+            if (distances <= radius_km).sum() >= k or len(candidates) == len(self.df):
+                break
+            radius_km *= 2
+        order = np.argsort(distances, kind='stable')[:k]
+        return self._result(positions[order], distances[order])
+
+
+def geo_index(dataset):
+    """``GeoIndex`` do dataset, construído uma vez por versão."""
+    return dataset.derived("geo_index", lambda d: GeoIndex(d.df, cuisines=cuisine_index(d)))
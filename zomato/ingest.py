@@ -0,0 +1,217 @@
+# ==============================================================================
+# INGESTÃO EM BLOCOS PARA ARQUIVOS GRANDES
+# ==============================================================================
+#
+# O build_dataset lê o CSV inteiro com pd.read_csv antes de limpar. Para dumps
+# grandes o snapshot é gerado aqui em blocos, com memória limitada pelo
+# tamanho do bloco:
+#
+#   1. cada bloco do CSV passa pelas etapas de etl.STAGES que valem linha a
+#      linha (rename, enriquecimento, nulos, culinárias, dólar...: todas fora
+#      de etl.FRAME_STAGES) e é gravado em um arquivo Arrow temporário. Ficam
+#      em memória só os ids, os votos e a marca de Mineira/Drinks Only;
+#   2. com esses inteiros são escolhidas as linhas mantidas (um registro por
+#      restaurant_id, pela mesma política do build_dataset, e sem as
+#      culinárias excluídas) e a ordem por restaurant_id. O temporário é
+#      mapeado em memória e regravado em blocos como snapshot, com as
+#      categóricas já no dicionário final (o mesmo em todos os blocos).
+#
+# O resultado é o mesmo snapshot que o zomato.snapshot gravaria a partir do
+# build_dataset (``check_parity`` confere). O load_or_build usa este caminho
+# para CSVs a partir de snapshot.STREAM_THRESHOLD_BYTES.
+#
+# Uso:  python -m zomato.ingest caminho/do/arquivo.csv [--chunk-rows 100000]
+#       python -m zomato.ingest caminho/do/arquivo.csv --check   # mesmo frame do build_dataset?
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.compute as pc
+
+from zomato.currency import load_rates, normalize_currency
+from zomato.etl import (CSV_PATH, DEDUPE_POLICIES, DEDUPE_POLICY, EXCLUDED_CUISINES, FRAME_STAGES, STAGES,
+                        build_dataset, dataset_version, dedupe_mask, file_key, file_version)
+from zomato.profiling import stage
+from zomato.schema import SCHEMA, apply_schema
+from zomato.snapshot import METADATA_KEY, read_snapshot, snapshot_metadata, snapshot_path
+
+
+CHUNK_ROWS = 100_000
+
+# Bloco pequeno na conferência: várias fronteiras de bloco mesmo em bases pequenas
+CHECK_CHUNK_ROWS = 1_000
+
+CATEGORY_COLUMNS = [column for column, dtype in SCHEMA.items() if dtype == "category"]
+
+# Tipos aplicados em cada bloco: as categóricas só no fim, com o dicionário final
+PLAIN_SCHEMA = {column: dtype for column, dtype in SCHEMA.items() if dtype != "category"}
+
+
+def chunk_stages(rates=None):
+    """Etapas de etl.STAGES que rodam bloco a bloco (fora de FRAME_STAGES), na
+    mesma ordem; a conversão de moeda usa a mesma tabela em todos os blocos."""
+    rates = rates or load_rates()
+    fixed = {"currency": lambda df: normalize_currency(df, rates)}
+    return [(name, fixed.get(name, func)) for name, func in STAGES if name not in FRAME_STAGES]
+
+
+def clean_chunk(chunk, stages=None):
+    """Pipeline de um bloco do CSV bruto, sem as duplicadas; devolve também as moedas sem taxa."""
+    df, reports = chunk, {}
+    for name, func in stages or chunk_stages():
+        df = func(df)
+        if isinstance(df, tuple):
+            df, reports[name] = df
+    return df, reports["currency"]["unknown_currencies"]
+
+
+def _plain_types(df):
+    """Tipos numéricos do SCHEMA; textos (inclusive as futuras categóricas) como string."""
+    df = apply_schema(df, PLAIN_SCHEMA)
+    fields = [pa.field(column, pa.string() if df[column].dtype == object else pa.from_numpy_dtype(df[column].dtype))
+              for column in df.columns]
+    return df, pa.schema(fields)
+
+
+def _take_rows(batches, starts, rows):
+    """Linhas ``rows`` (posições globais) dos ``batches``, nesta ordem.
+
+    Cada batch é consultado só pelas suas linhas: o Table.take de um Arrow
+    com vários blocos concatenaria a coluna inteira a cada chamada.
+    """
+    source = np.searchsorted(starts, rows, side="right") - 1
+    grouped = np.argsort(source, kind="stable")
+    parts = []
+    for index in np.unique(source):
+        local = rows[source == index] - starts[index]
+        parts.append(batches[index].take(pa.array(local)))
+    if not parts:
+        return pa.Table.from_batches([batches[0].slice(0, 0)])
+    table = pa.Table.from_batches(parts)
+    return table.take(pa.array(np.argsort(grouped, kind="stable")))
+
+
+def _category_dtypes(batches, starts, rows):
+    """Categóricas do SCHEMA com os valores das linhas mantidas, já ordenados."""
+    kept = np.zeros(starts[-1], dtype=bool)
+    kept[rows] = True
+    values = {column: set() for column in CATEGORY_COLUMNS if column in batches[0].schema.names}
+    for index, batch in enumerate(batches):
+        mask = pa.array(kept[starts[index]:starts[index + 1]])
+        for column in values:
+            values[column].update(pc.unique(pc.filter(batch.column(column), mask)).to_pylist())
+    return {column: pd.CategoricalDtype(sorted(found)) for column, found in values.items()}
+
+
+def ingest_csv(csv_path=CSV_PATH, path=None, chunk_rows=CHUNK_ROWS, policy=DEDUPE_POLICY):
+    """Gera o snapshot de ``csv_path`` em blocos; devolve o caminho e as contagens."""
+    csv_path = Path(csv_path)
+    path = Path(path or snapshot_path(csv_path))
+    rows_tmp = path.with_name(f".{path.name}.{os.getpid()}.rows.tmp")
+    final_tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    stats = {"rows_read": 0, "dropped_null": 0, "chunks": 0}
+    start = time.perf_counter()
+    # Estado e hash antes da leitura (ver zomato.snapshot.snapshot_metadata)
+    source_key, content = file_key(csv_path), file_version(csv_path)
+
+    try:
+        # 1. limpeza bloco a bloco para um Arrow temporário (textos simples)
+        ids, votes, excluded = [], [], []
+        rates, unknown = load_rates(), set()
+        stages = chunk_stages(rates)
+        writer = None
+        with stage("ingest:clean"):
+            for chunk in pd.read_csv(csv_path, chunksize=chunk_rows):
+                df, missing = clean_chunk(chunk, stages)
+                unknown.update(missing)
+                stats["rows_read"] += len(chunk)
+                stats["dropped_null"] += len(chunk) - len(df)
+                stats["chunks"] += 1
+
+                df, schema = _plain_types(df)
+                ids.append(df["restaurant_id"].to_numpy())
+                votes.append(df["votes"].to_numpy())
+                excluded.append(df["cuisines"].isin(EXCLUDED_CUISINES).to_numpy())
+                if writer is None:
+                    writer = pa.ipc.new_stream(rows_tmp, schema)
+                writer.write_table(pa.Table.from_pandas(df, schema=schema, preserve_index=False))
+            if writer is None:
+                raise ValueError(f"{csv_path} está vazio")
+            writer.close()
+
+        # 2. duplicadas, exclusões e ordem por restaurant_id, só com inteiros
+        with stage("ingest:dedupe"):
+            ids, votes, excluded = np.concatenate(ids), np.concatenate(votes), np.concatenate(excluded)
+            keep, reasons = dedupe_mask(ids, votes, policy)
+            stats["dedupe"] = {"policy": policy, "dropped": int((~keep).sum()), **reasons}
+            stats["dropped_excluded"] = int((keep & excluded).sum())
+            rows = np.flatnonzero(keep & ~excluded)
+            order = rows[np.argsort(ids[rows], kind="stable")]
+            del ids, votes, excluded, keep, rows
+
+        # 3. grava o snapshot em blocos, com as categóricas finais
+        with stage("ingest:write"):
+            source = pa.memory_map(str(rows_tmp))
+            batches = list(pa.ipc.open_stream(source))
+            starts = np.cumsum([0] + [len(batch) for batch in batches])
+            dtypes = _category_dtypes(batches, starts, order)
+            reports = {"dedupe": stats["dedupe"],
+                       "currency": {"rates_version": rates.version, "unknown_currencies": sorted(unknown)}}
+            meta = {METADATA_KEY: snapshot_metadata(source_key, dataset_version(content, reports), reports)}
+
+            writer = None
+            for begin in range(0, max(len(order), 1), chunk_rows):
+                part = _take_rows(batches, starts, order[begin:begin + chunk_rows]).to_pandas().astype(dtypes)
+                batch = pa.Table.from_pandas(part, preserve_index=False)
+                if writer is None:
+                    schema = batch.schema.with_metadata({**(batch.schema.metadata or {}), **meta})
+                    writer = pa.ipc.new_file(final_tmp, schema)
+                writer.write_table(batch.cast(schema))
+            writer.close()
+            del batches
+            source.close()
+        os.replace(final_tmp, path)
+    finally:
+        for tmp in (rows_tmp, final_tmp):
+            if tmp.exists():
+                tmp.unlink()
+
+    stats["rows_written"] = len(order)
+    stats["seconds"] = round(time.perf_counter() - start, 3)
+    return path, stats
+
+
+def check_parity(csv_path=CSV_PATH, chunk_rows=CHECK_CHUNK_ROWS, policies=DEDUPE_POLICIES):
+    """Confere que ``ingest_csv`` gera o mesmo frame que o ``build_dataset`` em
+    cada política de duplicadas; levanta ``AssertionError`` na primeira diferença."""
+    from pandas.testing import assert_frame_equal
+
+    for policy in policies:
+        with tempfile.TemporaryDirectory() as tmp:
+            path, _ = ingest_csv(csv_path, Path(tmp) / "check.arrow", chunk_rows, policy)
+            chunked = read_snapshot(path, csv_path).df
+        assert_frame_equal(chunked, build_dataset(csv_path, policy).df, obj=f"ingest ({policy})")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera o snapshot de um CSV grande em blocos.")
+    parser.add_argument("csv", nargs="?", default=CSV_PATH)
+    parser.add_argument("--output", help="arquivo do snapshot (padrão: ao lado do CSV)")
+    parser.add_argument("--chunk-rows", type=int, help=f"linhas por bloco (padrão: {CHUNK_ROWS}; "
+                                                       f"{CHECK_CHUNK_ROWS} com --check)")
+    parser.add_argument("--check", action="store_true",
+                        help="só confere se o resultado é igual ao build_dataset (nas duas políticas)")
+    args = parser.parse_args()
+
+    if args.check:
+        check_parity(args.csv, args.chunk_rows or CHECK_CHUNK_ROWS)
+        print(f"{args.csv}: ingestão em blocos igual ao build_dataset ({', '.join(DEDUPE_POLICIES)})")
+    else:
+        path, stats = ingest_csv(args.csv, args.output, args.chunk_rows or CHUNK_ROWS)
+        print(f"{path}: " + ", ".join(f"{key}={value}" for key, value in stats.items()))
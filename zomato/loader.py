@@ -0,0 +1,237 @@
+# ==============================================================================
+# CACHE DO DATASET POR PROCESSO
+# ==============================================================================
+#
+# Antes cada página repetia a leitura do CSV e toda a limpeza a cada rerun do
+# Streamlit. Aqui o DataFrame tratado é carregado uma única vez por processo,
+# identificado pelo mtime/tamanho do arquivo, e compartilhado (somente leitura)
+# entre todas as sessões e páginas.
+#
+# Com ZOMATO_SHARED_DIR definida o dataset (e os índices derivados) vem do
+# store compartilhado entre processos (zomato.shared).
+#
+# Recarga a quente: depois da primeira carga, uma thread confere o CSV (e a
+# tabela de câmbio; no modo compartilhado, também o store publicado) a cada
+# ZOMATO_WATCH_INTERVAL segundos. Quando ele muda e para de mudar, a nova
+# versão e todos os índices derivados são montados nessa thread e só então
+# entram no lugar da anterior, de uma vez. Nenhuma sessão espera: execuções
+# em andamento terminam com o ``Dataset`` que já pegaram e as seguintes
+# recebem o novo. Os caches por dataset são esvaziados na troca
+# (``on_reload``), para não manter a versão anterior viva, e um dataset já
+# substituído (``is_stale``) não volta a entrar neles.
+# ZOMATO_WATCH_INTERVAL=0 desliga a thread: cada chamada confere o arquivo e
+# recarrega na hora, como antes.
+
+import functools
+import logging
+import os
+import threading
+import time
+from pathlib import Path
+
+from zomato.currency import RATES_PATH
+from zomato.etl import CSV_PATH, file_key
+from zomato.profiling import stage
+from zomato.snapshot import load_or_build
+
+
+logger = logging.getLogger("zomato.loader")
+
+# Pasta do dataset compartilhado entre processos (None: cada processo carrega o seu)
+SHARED_DIR = os.environ.get("ZOMATO_SHARED_DIR") or None
+
+# Intervalo (s) entre as conferências do arquivo (0: confere a cada chamada)
+WATCH_INTERVAL = float(os.environ.get("ZOMATO_WATCH_INTERVAL") or 2)
+
+# Espera máxima (s) entre as novas tentativas de uma recarga que falhou
+RETRY_MAX = 60.0
+
+# CSV -> (estado dos arquivos na carga, Dataset atual)
+_current = {}
+_lock = threading.Lock()
+_watchers = {}
+_reload_hooks = []
+
+
+def on_reload(func):
+    """Registra ``func()``, chamada sempre que uma nova versão do dataset entra no lugar da anterior."""
+    _reload_hooks.append(func)
+    return func
+
+
+def is_stale(dataset):
+    """``dataset`` já foi substituído por outra versão do mesmo CSV?
+
+    Uma execução em andamento durante a troca ainda calcula com a versão
+    anterior; o resultado não deve voltar aos caches esvaziados na troca.
+    """
+    current = _current.get(dataset.source)
+    return current is not None and current[1] is not dataset
+
+
+def current_only(cached):
+    """Envolve ``cached`` (``functools.lru_cache``, 1º argumento um ``Dataset``)
+    para que versões já substituídas não fiquem no cache."""
+    @functools.wraps(cached)
+    def wrapper(dataset, *args):
+        if is_stale(dataset):
+            return cached.__wrapped__(dataset, *args)
+        result = cached(dataset, *args)
+        if is_stale(dataset):  # trocado durante o cálculo, depois do on_reload
+            cached.cache_clear()
+        return result
+
+    wrapper.cache_clear = cached.cache_clear
+    wrapper.cache_info = cached.cache_info
+    return wrapper
+
+
+def watch_key(path=CSV_PATH):
+    """Estado dos arquivos de que o dataset de ``path`` depende (muda -> recarga)."""
+    key = (file_key(path), file_key(RATES_PATH))
+    if SHARED_DIR:
+        from zomato.shared import read_current
+        return key, (read_current(SHARED_DIR) or {}).get("store")
+    return key
+
+
+def _load(path):
+    if SHARED_DIR:
+        from zomato.shared import load_shared
+        return load_shared(path, SHARED_DIR)
+    with stage("load"):
+        return load_or_build(path)
+
+
+def _build(path):
+    """Nova versão de ``path`` já com todos os índices derivados (zomato.shared.DERIVED)."""
+    from zomato.shared import DERIVED
+    dataset = _load(path)
+    for build in DERIVED:
+        build(dataset)
+    return dataset
+
+
+def _swap(name, key, dataset):
+    with _lock:
+        previous = _current.get(name)
+        _current[name] = (key, dataset)
+    if previous is not None and previous[1] is not dataset:
+        logger.info("dataset %s: versão %s -> %s", name, previous[1].version, dataset.version)
+        for hook in _reload_hooks:
+            try:
+                hook()
+            except Exception:  # um cache com problema não impede os outros nem a troca
+                logger.exception("falha no on_reload %r", hook)
+
+
+def load_dataset(path=CSV_PATH):
+    """Retorna o ``Dataset`` tratado atual de ``path``.
+
+    O resultado fica em memória no processo e é o mesmo objeto para todas as
+    sessões do Streamlit; o lock evita que várias sessões simultâneas façam a
+    primeira carga ao mesmo tempo. Depois dela as mudanças no arquivo são
+    aplicadas em segundo plano (``DatasetWatcher``): esta função não espera.
+    """
+    name = os.fspath(path)
+    current = _current.get(name)
+    if current is not None and (WATCH_INTERVAL > 0 or current[0] == watch_key(path)):
+        return current[1]
+
+    with _lock:
+        current = _current.get(name)
+        if current is None or (WATCH_INTERVAL <= 0 and current[0] != watch_key(path)):
+            key = watch_key(path)
+            dataset = _load(path)
+        else:
+            key = dataset = None
+    if dataset is not None:
+        _swap(name, key, dataset)
+        if WATCH_INTERVAL > 0:
+            _start_watcher(path, key)
+    return _current[name][1]
+
+
+def load_data(path=CSV_PATH):
+    """Atalho para as páginas: devolve apenas o DataFrame tratado."""
+    return load_dataset(path).df
+
+
+# ==============================================================================
+# RECARGA EM SEGUNDO PLANO
+# ==============================================================================
+
+class DatasetWatcher(threading.Thread):
+    """Confere ``path`` a cada ``interval`` s e troca o dataset quando ele muda.
+
+    Uma recarga que falha é tentada de novo com espera dobrada a cada falha
+    (até ``RETRY_MAX``); uma nova mudança nos arquivos é tentada na hora.
+    """
+
+    def __init__(self, path, key, interval=WATCH_INTERVAL):
+        super().__init__(name=f"zomato-watch:{Path(path).name}", daemon=True)
+        self.path = path
+        self.key = key
+        self.interval = interval
+        self.building = False
+        self.reloads = 0
+        self.error = None
+        self.failures = 0
+        self.failed_key = None
+        self.retry_at = 0.0
+        self.stopped = threading.Event()
+
+    def run(self):
+        pending = None
+        while not self.stopped.wait(self.interval):
+            try:
+                key = watch_key(self.path)
+            except OSError:
+                continue  # arquivo sendo substituído
+            if key == self.key:
+                pending = None
+                self.failures, self.failed_key, self.error = 0, None, None
+            elif key != pending:
+                pending = key  # ainda mudando: espera uma conferência sem mudança
+            elif key != self.failed_key or time.monotonic() >= self.retry_at:
+                self.reload(key)
+
+    def reload(self, key):
+        """Monta a versão de ``key`` e a coloca no lugar da atual."""
+        self.building = True
+        start = time.perf_counter()
+        try:
+            dataset = _build(self.path)
+        except Exception as error:  # a versão atual continua valendo
+            self.failures = self.failures + 1 if key == self.failed_key else 1
+            self.failed_key = key
+            delay = min(self.interval * 2 ** self.failures, RETRY_MAX)
+            self.retry_at = time.monotonic() + delay
+            logger.exception("falha ao recarregar %s (nova tentativa em %.0f s)", self.path, delay)
+            self.error = f"{type(error).__name__}: {error}"
+        else:
+            self.key = key
+            self.failures, self.failed_key, self.error = 0, None, None
+            self.reloads += 1
+            dataset.timings["reload"] = time.perf_counter() - start
+            _swap(os.fspath(self.path), key, dataset)
+        finally:
+            self.building = False
+
+    def status(self):
+        return {"interval": self.interval, "building": self.building, "reloads": self.reloads,
+                "failures": self.failures, "error": self.error}
+
+
+def _start_watcher(path, key):
+    name = os.fspath(path)
+    with _lock:
+        if name not in _watchers:
+            _watchers[name] = DatasetWatcher(path, key)
+            _watchers[name].start()
+
+
+def reload_status():
+    """Versão atual e estado da recarga de cada CSV carregado."""
+    return {name: dict(version=dataset.version, **(_watchers[name].status() if name in _watchers else {}))
+            for name, (_, dataset) in list(_current.items())}
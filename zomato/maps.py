@@ -0,0 +1,133 @@
+# ==============================================================================
+# MAPA DOS RESTAURANTES
+# ==============================================================================
+#
+# Em vez de criar um fl.Marker com Popup e Icon por restaurante (um bloco de
+# HTML/JS para cada linha), os marcadores são enviados como arrays de colunas e
+# criados no navegador pelo FastMarkerCluster. O HTML do popup só é montado
+# quando o usuário clica no marcador.
+#
+# O navegador recebe apenas o que está visível (``view_layer``): células
+# agregadas do zomato.spatial.GridIndex para o zoom atual ou, bem de perto, os
+# restaurantes da área visível. Áreas densas sempre chegam agregadas.
+#
+# O popup mostra o preço na moeda local e o equivalente em dólar: vai uma taxa
+# por par (moeda, país), não um valor convertido por restaurante.
+
+import json
+import math
+
+import folium as fl
+from folium.plugins import FastMarkerCluster
+
+from zomato.currency import factorize_pairs, load_rates
+from zomato.profiling import timed
+from zomato.spatial import grid_index, lon_mask, normalize_bounds
+
+
+# Máximo de restaurantes individuais na área visível com o zoom além do índice
+DETAIL_MARKER_LIMIT = 2_000
+
+# Casas decimais das coordenadas: 5 casas ~ 1 metro
+COORD_DECIMALS = 5
+
+
+_CALLBACK = """(function () {
+    var info = %s;
+    var escape = function (text) {
+        return String(text).replace(/[&<>"']/g, function (c) {
+            return {'&': '&amp;', '<': '&lt;', '>': '&gt;', '"': '&quot;', "'": '&#39;'}[c];
+        });
+    };
+    return function (row) {
+        var i = row[2];
+        var marker = L.marker([row[0], row[1]], {
+            icon: L.AwesomeMarkers.icon({
+                icon: 'home', prefix: 'fa', markerColor: info.colors[info.color[i]]
+            })
+        });
+        marker.bindPopup(function () {
+            return '<p><strong>' + escape(info.name[i]) + '</strong></p>'
+                + '<p>Preço: ' + info.cost[i] + ',00 (' + escape(info.currencies[info.currency[i]]) + ') para dois'
+                + (info.usd[info.currency[i]] === null ? ''
+                   : ' (~ US$ ' + (info.cost[i] * info.usd[info.currency[i]]).toFixed(2) + ')')
+                + '<br />Culinária: ' + escape(info.cuisines[info.cuisine[i]])
+                + '<br />Avaliação: ' + info.rating[i] + '/5.0';
+        }, {maxWidth: 500});
+        return marker;
+    };
+})()"""
+
+
+def _codes(column):
+    """Códigos inteiros + lista de valores distintos de uma coluna."""
+    if column.dtype.name != "category":
+        column = column.astype("category")
+    return column.cat.codes.tolist(), [str(value) for value in column.cat.categories]
+
+
+def marker_layer(df):
+    """FastMarkerCluster com os dados em colunas e popups montados sob demanda."""
+    color, colors = _codes(df['color_name'])
+    # Código por par (moeda, país): "Dollar($)" vale taxas diferentes em cada país
+    currency, pairs = factorize_pairs(df['currency'], df['country'])
+    rates = load_rates()
+    usd = [rates.usd(*pair) for pair in pairs]
+    cuisine, cuisines = _codes(df['cuisines'])
+    info = {
+        "name": df['restaurant_name'].astype(str).tolist(),
+        "cost": df['average_cost_for_two'].tolist(),
+        "rating": df['aggregate_rating'].tolist(),
+        "color": color, "colors": colors,
+        "currency": currency.tolist(), "currencies": [str(label) for label, _ in pairs],
+        "usd": [None if factor != factor else factor for factor in usd],
+        "cuisine": cuisine, "cuisines": cuisines,
+    }
+    data = [
+        [lat, lon, i]
+        for i, (lat, lon) in enumerate(zip(
+            df['latitude'].astype('float64').round(COORD_DECIMALS).tolist(),
+            df['longitude'].astype('float64').round(COORD_DECIMALS).tolist(),
+        ))
+    ]
+    return FastMarkerCluster(data, callback=_CALLBACK % json.dumps(info, ensure_ascii=False))
+
+
+def cell_layer(cells):
+    """Um círculo por célula do índice espacial, com raio pela contagem."""
+    layer = fl.FeatureGroup(name="Restaurantes")
+    for cell in cells.itertuples(index=False):
+        fl.CircleMarker(
+            location=[round(cell.latitude, COORD_DECIMALS), round(cell.longitude, COORD_DECIMALS)],
+            radius=6 + 3 * math.log2(cell.count),
+            color=cell.color_name, fill=True, fill_opacity=0.6, weight=1,
+            tooltip=f"{cell.count} restaurantes<br />Avaliação média: {cell.aggregate_rating}/5.0",
+        ).add_to(layer)
+    return layer
+
+
+@timed("render-map")
+def view_layer(dataset, df, countries, zoom=None, bounds=None):
+    """Camada com o conteúdo da área visível do mapa.
+
+    ``df`` é o frame já filtrado pelos ``countries``. Até o zoom máximo do
+    índice (ou quando a área tem restaurantes demais) a camada traz as
+    células agregadas; além disso, os marcadores da área visível.
+    """
+    grid = grid_index(dataset)
+    zoom = grid.min_zoom if zoom is None else zoom
+
+    if zoom > grid.max_zoom:
+        box = normalize_bounds(bounds)
+        rows = df
+        if box is not None:
+            south, west, north, east = box
+            lat = df['latitude'].to_numpy(dtype='float64')
+            lon = df['longitude'].to_numpy(dtype='float64')
+            rows = df.loc[(lat >= south) & (lat <= north) & lon_mask(lon, west, east)]
+        if len(rows) <= DETAIL_MARKER_LIMIT:
+            layer = fl.FeatureGroup(name="Restaurantes")
+            marker_layer(rows).add_to(layer)
+            return layer
+
+    return cell_layer(grid.query(zoom, bounds, countries))
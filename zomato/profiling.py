@@ -0,0 +1,236 @@
+# ==============================================================================
+# INSTRUMENTAÇÃO POR ETAPA
+# ==============================================================================
+#
+# Cada etapa nomeada do ETL e da renderização (load, rename, enrich, clean,
+# filter, aggregate, query, render-map, render-chart, export...) roda dentro de
+# ``stage(nome)``, que mede o tempo e a variação de memória residente (RSS).
+# As medições vão para:
+#
+#   - a execução atual da página (thread do script), mostrada no painel de
+#     diagnóstico da barra lateral (zomato.ui.debug_panel);
+#   - as métricas acumuladas do processo (``metrics``), em JSON, servidas em
+#     /metrics quando ZOMATO_METRICS_PORT está definida;
+#   - o logger "zomato.stages", uma linha JSON por etapa (nível DEBUG;
+#     ZOMATO_STAGE_LOG=1 liga a saída no stderr).
+#
+# ``profile_run`` captura um perfil (cProfile ou pyinstrument, se instalado)
+# de uma única execução.
+
+import cProfile
+import functools
+import io
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+try:
+    from pyinstrument import Profiler as Pyinstrument
+except ImportError:
+    Pyinstrument = None
+
+
+logger = logging.getLogger("zomato.stages")
+
+# Medições mais recentes guardadas para o endpoint de métricas
+HISTORY = 256
+
+# Linhas do relatório do cProfile
+PROFILE_LINES = 40
+
+try:
+    _PAGE_SIZE = os.sysconf("SC_PAGE_SIZE")
+except (AttributeError, ValueError, OSError):
+    _PAGE_SIZE = None
+
+
+def rss_bytes():
+    """Memória residente atual do processo, ou None se não der para medir."""
+    if _PAGE_SIZE is None:
+        return None
+    try:
+        with open("/proc/self/statm") as statm:
+            return int(statm.read().split()[1]) * _PAGE_SIZE
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Metrics:
+    """Totais por etapa (contagem, tempo total/máximo, RSS) + últimas medições."""
+
+    def __init__(self, history=HISTORY):
+        self.stages = {}
+        self.recent = deque(maxlen=history)
+        self.started = time.time()
+        self._lock = threading.Lock()
+
+    def record(self, record):
+        with self._lock:
+            totals = self.stages.setdefault(record["stage"], {
+                "count": 0, "total_s": 0.0, "max_s": 0.0, "last_s": 0.0, "rss_delta_bytes": 0})
+            totals["count"] += 1
+            totals["total_s"] += record["seconds"]
+            totals["max_s"] = max(totals["max_s"], record["seconds"])
+            totals["last_s"] = record["seconds"]
+            totals["rss_delta_bytes"] += record["rss_delta_bytes"] or 0
+            self.recent.append(record)
+
+    def snapshot(self):
+        with self._lock:
+            return {"uptime_s": round(time.time() - self.started, 3),
+                    "rss_bytes": rss_bytes(),
+                    "stages": {name: dict(totals) for name, totals in self.stages.items()},
+                    "recent": list(self.recent)}
+
+    def clear(self):
+        with self._lock:
+            self.stages.clear()
+            self.recent.clear()
+
+
+metrics = Metrics()
+
+# Execução de página em andamento nesta thread (o Streamlit roda cada
+# sessão na sua própria thread de script)
+_run = threading.local()
+
+
+def begin_run(page):
+    """Começa a coletar as etapas de uma execução de ``page`` nesta thread."""
+    _run.page = page
+    _run.records = []
+    return _run.records
+
+
+def end_run():
+    """Encerra a coleta desta thread e devolve as etapas medidas."""
+    records = getattr(_run, "records", None) or []
+    _run.page = None
+    _run.records = None
+    return records
+
+
+@contextmanager
+def stage(name, **labels):
+    """Mede tempo e variação de RSS do bloco como a etapa ``name``.
+
+    O dicionário devolvido recebe ``seconds`` e ``rss_delta_bytes`` ao final.
+    """
+    record = {"stage": name, **labels}
+    rss_before = rss_bytes()
+    start = time.perf_counter()
+    try:
+        yield record
+    finally:
+        record["seconds"] = time.perf_counter() - start
+        rss_after = rss_bytes()
+        record["rss_delta_bytes"] = None if rss_before is None or rss_after is None else rss_after - rss_before
+        record["page"] = getattr(_run, "page", None)
+        record["time"] = time.time()
+
+        records = getattr(_run, "records", None)
+        if records is not None:
+            records.append(record)
+        metrics.record(record)
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug(json.dumps(record, default=str))
+
+
+def timed(name):
+    """Decorador: cada chamada da função é medida como a etapa ``name``."""
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return func(*args, **kwargs)
+        return wrapper
+    return decorator
+
+
+# ==============================================================================
+# PERFIL DE UMA EXECUÇÃO
+# ==============================================================================
+
+def profilers():
+    """Perfis disponíveis neste ambiente."""
+    return ["cProfile"] + (["pyinstrument"] if Pyinstrument is not None else [])
+
+
+@contextmanager
+def profile_run(engine="cProfile"):
+    """Perfila o bloco; o relatório (texto) fica em ``result['report']``."""
+    result = {"engine": engine, "report": ""}
+    if engine == "pyinstrument" and Pyinstrument is not None:
+        profiler = Pyinstrument()
+        profiler.start()
+        try:
+            yield result
+        finally:
+            profiler.stop()
+            result["report"] = profiler.output_text(unicode=True, color=False)
+        return
+
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield result
+    finally:
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats("cumulative").print_stats(PROFILE_LINES)
+        result["report"] = out.getvalue()
+
+
+# ==============================================================================
+# SAÍDAS: LOG ESTRUTURADO E ENDPOINT DE MÉTRICAS
+# ==============================================================================
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split("?")[0] != "/metrics":
+            self.send_error(404)
+            return
+        body = json.dumps(metrics.snapshot(), default=str).encode()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # sem log de acesso no stderr do Streamlit
+
+
+_server = None
+_server_lock = threading.Lock()
+
+
+def serve_metrics(port, host="127.0.0.1"):
+    """Sobe (uma vez por processo) o endpoint GET /metrics em uma thread."""
+    global _server
+    with _server_lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name="zomato-metrics", daemon=True).start()
+    return _server
+
+
+def configure_from_env():
+    """Liga o log estruturado e o endpoint de métricas conforme o ambiente."""
+    if os.environ.get("ZOMATO_STAGE_LOG") and not logger.handlers:
+        handler = logging.StreamHandler()
+        handler.setFormatter(logging.Formatter("%(message)s"))
+        logger.addHandler(handler)
+        logger.setLevel(logging.DEBUG)
+    port = os.environ.get("ZOMATO_METRICS_PORT")
+    if port:
+        try:
+            serve_metrics(port)
+        except OSError:
+            logger.warning("endpoint de métricas indisponível na porta %s", port)
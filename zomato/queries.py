@@ -0,0 +1,225 @@
+# ==============================================================================
+# API DE CONSULTAS DO DASHBOARD
+# ==============================================================================
+#
+# Os números que as páginas mostram (resumo por país, rankings de cidades e de
+# culinárias, melhores restaurantes) saem daqui, como funções Python puras:
+# recebem o ``Dataset`` e parâmetros explícitos (países, n, ordem...) e não
+# dependem do Streamlit. As páginas só escolhem os parâmetros pelos widgets e
+# desenham o resultado.
+#
+# Cada consulta tem o seu próprio cache (LRU por dataset + parâmetros). Um
+# rerun causado por um widget recalcula só a consulta cujo parâmetro mudou;
+# as demais são lidas do cache. Os resultados são compartilhados entre as
+# sessões: quem chama deve apenas ler (ordenar/filtrar gera cópias).
+#
+# ``QUERIES`` registra todas as consultas pelo nome.
+#
+# Com ZOMATO_API_URL definida, as consultas fora do cache são pedidas ao
+# serviço HTTP (zomato.service) em vez de calculadas aqui; se ele não
+# responde, o cálculo volta a ser local.
+
+import functools
+import inspect
+import logging
+import os
+import threading
+from collections import OrderedDict
+
+from zomato import ranking
+from zomato.cube import aggregate_cube, cuisine_cube
+from zomato.cuisines import cuisine_index
+from zomato.filters import filter_index
+from zomato.loader import is_stale, on_reload
+from zomato.profiling import stage
+
+
+logger = logging.getLogger("zomato.queries")
+
+CACHE_SIZE = 128
+
+# Endereço do serviço de consultas (None: calcula no próprio processo)
+API_URL = os.environ.get("ZOMATO_API_URL") or None
+
+# Parâmetros em que a ordem dos valores não importa (a chave do cache os ordena)
+UNORDERED = ('countries',)
+
+QUERIES = {}
+
+# Faixas de nota da Visão Cidades e a medida do cubo de cada uma
+RATING_BANDS = {'good': 'good_ratings', 'bad': 'bad_ratings'}
+
+
+def _freeze(value, unordered=False):
+    if isinstance(value, (list, tuple, set, frozenset)):
+        items = [_freeze(item) for item in value]
+        return tuple(sorted(items)) if unordered else tuple(items)
+    return value
+
+
+def query(func=None, *, maxsize=CACHE_SIZE):
+    """Registra ``func(dataset, ...)`` como consulta com cache LRU próprio.
+
+    Listas nos parâmetros viram tuplas na chave; ``countries`` independe da
+    ordem. O cálculo de uma consulta fora do cache é medido como a etapa
+    "query".
+    """
+    if func is None:
+        return lambda f: query(f, maxsize=maxsize)
+
+    signature = inspect.signature(func)
+    cache = OrderedDict()
+    lock = threading.Lock()
+    stats = {'hits': 0, 'misses': 0}
+
+    @functools.wraps(func)
+    def wrapper(dataset, *args, **kwargs):
+        bound = signature.bind(dataset, *args, **kwargs)
+        bound.apply_defaults()
+        key = (dataset,) + tuple((name, _freeze(value, name in UNORDERED))
+                                 for name, value in list(bound.arguments.items())[1:])
+        with lock:
+            if key in cache:
+                cache.move_to_end(key)
+                stats['hits'] += 1
+                return cache[key]
+            stats['misses'] += 1
+
+        with stage('query', query=func.__name__):
+            result = _remote(func.__name__, dict(list(bound.arguments.items())[1:]))
+            if result is None:
+                result = func(*bound.args, **bound.kwargs)
+
+        if is_stale(dataset):  # versão já substituída: não volta ao cache
+            return result
+        with lock:
+            cache[key] = result
+            while len(cache) > maxsize:
+                cache.popitem(last=False)
+        return result
+
+    def cache_clear():
+        with lock:
+            cache.clear()
+            stats.update(hits=0, misses=0)
+
+    wrapper.cache_info = lambda: dict(stats, size=len(cache), maxsize=maxsize)
+    wrapper.cache_clear = cache_clear
+    QUERIES[func.__name__] = wrapper
+    return wrapper
+
+
+def _remote(name, params):
+    """Resultado da consulta no serviço em ``API_URL``, ou None (sem serviço ou falha)."""
+    if API_URL is None:
+        return None
+    from zomato.service import fetch_query
+    try:
+        return fetch_query(API_URL, name, params)
+    except (OSError, ValueError) as error:
+        logger.warning("serviço de consultas indisponível (%s): calculando localmente", error)
+        return None
+
+
+def cache_info():
+    """Acertos/faltas/tamanho do cache de cada consulta."""
+    return {name: func.cache_info() for name, func in QUERIES.items()}
+
+
+@on_reload
+def cache_clear():
+    """Esvazia o cache de todas as consultas (os resultados da versão anterior do dataset)."""
+    for func in QUERIES.values():
+        func.cache_clear()
+
+
+# ==============================================================================
+# VISÃO GERAL
+# ==============================================================================
+
+def _column(dataset, column, rows):
+    """Só a coluna ``column`` nas posições ``rows`` (None = todas), sem copiar o frame."""
+    values = dataset.df[column]
+    return values if rows is None else values.take(rows)
+
+
+@query
+def overview(dataset, countries=None):
+    """Restaurantes, países, cidades, votos e culinárias servidas nos ``countries``."""
+    rows = filter_index(dataset).rows(country=countries)
+    return {
+        'restaurants': len(_column(dataset, 'restaurant_id', rows).unique()),
+        'countries': _column(dataset, 'country', rows).nunique(),
+        'cities': _column(dataset, 'city', rows).nunique(),
+        'votes': int(_column(dataset, 'votes', rows).sum()),
+        'cuisines': len(served_cuisines(dataset, countries)),
+    }
+
+
+@query
+def served_cuisines(dataset, countries=None):
+    """Culinárias (em ordem alfabética) servidas por algum restaurante dos ``countries``."""
+    return cuisine_index(dataset).served(filter_index(dataset).rows(country=countries))
+
+
+# ==============================================================================
+# PAÍSES
+# ==============================================================================
+
+@query
+def country_summary(dataset, countries=None):
+    """Por país: restaurantes, cidades (``city``), médias de votos e de custo (local e US$)."""
+    summary = aggregate_cube(dataset).rollup(['country'], countries, distinct=['city'])
+    return summary[['restaurants', 'city', 'votes_mean', 'cost_mean', 'cost_usd_mean']]
+
+
+# ==============================================================================
+# CIDADES
+# ==============================================================================
+
+@query
+def top_cities(dataset, countries=None, n=10):
+    """As ``n`` cidades com mais restaurantes (empate: nome da cidade)."""
+    cities = aggregate_cube(dataset).rollup(['city', 'country'], countries)[['rows']]
+    cities = cities.rename(columns={'rows': 'restaurants'})
+    return cities.sort_values(['restaurants', 'city'], ascending=[False, True]).reset_index()[:n]
+
+
+@query
+def cities_by_rating(dataset, countries=None, band='good', n=7):
+    """As ``n`` cidades com mais restaurantes na faixa de nota ``band`` ('good' ou 'bad')."""
+    measure = RATING_BANDS[band]
+    cities = aggregate_cube(dataset).rollup(['country', 'city'], countries)
+    cities = cities.loc[cities[measure] > 0, [measure]].rename(columns={measure: 'restaurants'})
+    return cities.sort_values('restaurants', ascending=False).reset_index()[:n]
+
+
+@query
+def cities_by_cuisine_variety(dataset, countries=None, n=10):
+    """As ``n`` cidades com mais culinárias diferentes (todas as que cada restaurante serve)."""
+    cities = cuisine_cube(dataset).rollup(['country', 'city'], countries, distinct=['cuisines'])
+    return cities[['cuisines']].sort_values(['cuisines', 'country'], ascending=[False, True]).reset_index()[:n]
+
+
+# ==============================================================================
+# CULINÁRIAS E RESTAURANTES
+# ==============================================================================
+
+@query
+def cuisine_ratings(dataset, countries=None, ascending=False, n=20):
+    """Nota média (2 casas) das ``n`` melhores (ou piores) culinárias."""
+    ratings = cuisine_cube(dataset).rollup(['cuisines'], countries)[['rating_mean']]
+    ratings = ratings.rename(columns={'rating_mean': 'aggregate_rating'})
+    return ratings.sort_values('aggregate_rating', ascending=ascending).round(2)[:n]
+
+
+@query
+def best_per_cuisine(dataset, countries=None, cuisines=None, n=1):
+    """Os ``n`` melhores restaurantes de cada culinária, na ordem de ``cuisines``."""
+    return ranking.top_per_cuisine(dataset, countries, n=n, cuisines=cuisines)
+
+
+@query
+def top_restaurants(dataset, countries=None, n=10):
+    """Os ``n`` restaurantes mais bem avaliados (empate: restaurant_id)."""
+    return ranking.top_restaurants(dataset, countries, n)
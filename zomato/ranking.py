@@ -0,0 +1,82 @@
+# ==============================================================================
+# RANKING DOS MELHORES RESTAURANTES POR CULINÁRIA
+# ==============================================================================
+#
+# A Visão Restaurantes fazia um str.contains + sort_values completo para cada
+# culinária. Aqui a base é ordenada uma única vez por versão do dataset (nota
+# decrescente, restaurant_id crescente para desempate) e o top-N de todas as
+# culinárias sai de uma única ordenação dos pares (restaurante, culinária) de
+# zomato.cuisines pela posição no ranking: um restaurante concorre em todas
+# as culinárias que serve. O resultado fica em cache por seleção de países.
+
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from zomato.cuisines import cuisine_index
+from zomato.loader import current_only, on_reload
+
+
+RANKING_ORDER = ['aggregate_rating', 'restaurant_id']
+RANKING_ASCENDING = [False, True]
+
+
+def ranked(dataset):
+    """DataFrame do dataset na ordem do ranking, construído uma vez por versão."""
+    return dataset.derived(
+        "ranked", lambda d: d.df.sort_values(RANKING_ORDER, ascending=RANKING_ASCENDING, kind='stable'))
+
+
+@current_only
+@lru_cache(maxsize=64)
+def _top_per_cuisine(dataset, countries, n):
+    index = cuisine_index(dataset)
+    # Posição de cada linha no ranking (o ranked preserva o índice original)
+    position = np.empty(len(dataset.df), dtype='int64')
+    position[ranked(dataset).index.to_numpy()] = np.arange(len(dataset.df))
+
+    rows, codes = index.row_positions, index.cuisine_codes
+    if countries is not None:
+        inside = dataset.df['country'].isin(countries).to_numpy()[rows]
+        rows, codes = rows[inside], codes[inside]
+
+    # Pares por culinária e, dentro dela, pela posição no ranking
+    order = np.lexsort((position[rows], codes))
+    rows, codes = rows[order], codes[order]
+    first = np.flatnonzero(np.r_[True, codes[1:] != codes[:-1]])
+    rank = np.arange(len(codes)) - np.repeat(first, np.diff(np.r_[first, len(codes)]))
+    keep = rank < n
+    rows, codes, rank = rows[keep], codes[keep], rank[keep]
+
+    # Na ordem do ranking geral, como o groupby().head(n) sobre o ranked
+    order = np.argsort(position[rows], kind='stable')
+    top = dataset.df.take(rows[order])
+    return top.assign(cuisines=pd.Categorical.from_codes(codes[order], index.cuisines),
+                      rank=rank[order] + 1)
+
+
+on_reload(_top_per_cuisine.cache_clear)
+
+
+def top_per_cuisine(dataset, countries=None, n=1, cuisines=None):
+    """Os ``n`` melhores restaurantes de cada culinária nos ``countries``.
+
+    Devolve as linhas do dataset com a coluna ``rank`` (1 = melhor). Com
+    ``cuisines`` devolve apenas essas culinárias, na ordem pedida.
+    """
+    countries = None if countries is None else tuple(sorted(countries))
+    top = _top_per_cuisine(dataset, countries, n)
+    if cuisines is None:
+        return top
+    selected = top.loc[top['cuisines'].isin(cuisines)]
+    position = selected['cuisines'].astype(str).map({cuisine: i for i, cuisine in enumerate(cuisines)})
+    return selected.iloc[np.lexsort((selected['rank'].to_numpy(), position.to_numpy()))]
+
+
+def top_restaurants(dataset, countries=None, n=10):
+    """Os ``n`` restaurantes mais bem avaliados nos ``countries``."""
+    df = ranked(dataset)
+    if countries is not None:
+        df = df.loc[df['country'].isin(countries)]
+    return df.head(n)
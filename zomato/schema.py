@@ -0,0 +1,61 @@
+# ==============================================================================
+# SCHEMA DE TIPOS DO DATAFRAME TRATADO
+# ==============================================================================
+#
+# Colunas de texto com poucos valores distintos viram categóricas e as flags e
+# contagens usam inteiros pequenos. A nota (aggregate_rating) continua float64
+# porque é exibida diretamente nas métricas e tabelas: em float32 um 4.6
+# apareceria como 4.599999904632568. As flags ficam em int8 (e não bool) para
+# que o CSV do botão Download continue com 0/1.
+
+import pandas as pd
+
+
+SCHEMA = {
+    "restaurant_id": "int64",
+    "country_code": "int16",
+    "city": "category",
+    "locality": "category",
+    "longitude": "float32",
+    "latitude": "float32",
+    "cuisines": "category",
+    "all_cuisines": "category",
+    "average_cost_for_two": "int32",
+    "cost_for_two_usd": "float64",
+    "currency": "category",
+    "has_table_booking": "int8",
+    "has_online_delivery": "int8",
+    "is_delivering_now": "int8",
+    "switch_to_order_menu": "int8",
+    "price_range": "int8",
+    "aggregate_rating": "float64",
+    "rating_color": "category",
+    "rating_text": "category",
+    "votes": "int32",
+    "country": "category",
+    "price_type": "category",
+    "color_name": "category",
+}
+
+
+def apply_schema(df, schema=SCHEMA):
+    """Converte as colunas presentes em ``df`` para os tipos do ``schema``."""
+    dtypes = {column: dtype for column, dtype in schema.items() if column in df.columns}
+    return df.astype(dtypes)
+
+
+def memory_report(df, baseline=None):
+    """Memória (deep) por coluna; com ``baseline`` compara com outro frame."""
+    report = pd.DataFrame({
+        "dtype": df.dtypes.astype(str),
+        "bytes": df.memory_usage(index=False, deep=True),
+    })
+    if baseline is not None:
+        report["baseline_bytes"] = baseline.memory_usage(index=False, deep=True)
+        report["saving"] = 1 - report["bytes"] / report["baseline_bytes"]
+    report.loc["total"] = report.sum(numeric_only=True)
+    report.loc["total", "dtype"] = ""
+    if baseline is not None:
+        report.loc["total", "saving"] = 1 - report.loc["total", "bytes"] / report.loc["total", "baseline_bytes"]
+    report["bytes_per_row"] = report["bytes"] / max(len(df), 1)
+    return report
@@ -0,0 +1,291 @@
+# ==============================================================================
+# BUSCA TEXTUAL DE RESTAURANTES (NOME, BAIRRO, ENDEREÇO)
+# ==============================================================================
+#
+# Um str.contains sobre restaurant_name, locality_verbose e address percorreria
+# todas as linhas a cada tecla. O índice é montado uma vez por versão do
+# dataset:
+#
+#   - os textos são normalizados (minúsculas, sem acentos) e quebrados em
+#     palavras; cada texto distinto é processado uma única vez;
+#   - índice invertido palavra -> linhas, em formato CSR sobre o vocabulário
+#     ORDENADO: todas as palavras que começam com um prefixo são vizinhas, e
+#     as suas linhas são uma única fatia de ``postings``. Cada posting guarda
+#     o peso do campo onde a palavra aparece (nome > bairro > endereço);
+#   - índice de trigramas do vocabulário para a busca aproximada: candidatas
+#     a até 1-2 edições de distância são as palavras que compartilham
+#     trigramas suficientes, e só elas passam pelo Levenshtein.
+#
+# Todos os termos da busca precisam casar (E). A pontuação de cada termo é
+# qualidade (exata > prefixo > aproximada) x peso do campo; empates saem pela
+# nota e pelos votos. A consulta só faz operações vetorizadas sobre arrays do
+# tamanho da base, sem tocar nos textos.
+
+import re
+import threading
+import unicodedata
+from bisect import bisect_left
+from collections import OrderedDict
+from functools import lru_cache
+
+import numpy as np
+import pandas as pd
+
+from zomato.filters import filter_index
+from zomato.loader import current_only, on_reload
+from zomato.profiling import timed
+
+
+# Campos indexados e o peso de cada um na pontuação
+FIELDS = {'restaurant_name': 4, 'locality_verbose': 2, 'address': 1}
+
+# Qualidade do casamento de cada termo
+EXACT, PREFIX, FUZZY = 3, 2, 1
+
+# Tamanho mínimo do termo para casar por prefixo e para a busca aproximada
+# (1 edição a partir de FUZZY_MIN_LENGTH, 2 a partir de FUZZY2_MIN_LENGTH)
+PREFIX_MIN_LENGTH = 2
+FUZZY_MIN_LENGTH = 5
+FUZZY2_MIN_LENGTH = 9
+
+RESULT_LIMIT = 20
+
+RESULT_COLUMNS = ['restaurant_id', 'restaurant_name', 'locality_verbose', 'address', 'city', 'country',
+                  'all_cuisines', 'aggregate_rating', 'votes']
+
+CACHE_SIZE = 1024
+
+TOKEN = r'\w+'
+_TOKEN = re.compile(TOKEN)
+COMBINING = r'[\u0300-\u036f]'
+_COMBINING = re.compile(COMBINING)
+# Letras sem decomposição que o usuário digita sem o sinal (o ı turco como i)
+FOLD = str.maketrans({'ı': 'i', 'ø': 'o', 'ł': 'l', 'đ': 'd'})
+
+
+def tokenize(text):
+    """Palavras normalizadas de ``text`` (as mesmas regras do índice)."""
+    text = unicodedata.normalize('NFKD', str(text).lower())
+    return _TOKEN.findall(_COMBINING.sub('', text).translate(FOLD))
+
+
+def _tokenize_all(values):
+    """``tokenize`` vetorizado: Series (posição em ``values``, palavra)."""
+    text = pd.Series(values, dtype=object).astype(str).str.lower().str.normalize('NFKD')
+    text = text.str.replace(COMBINING, '', regex=True).str.translate(FOLD)
+    return text.str.findall(TOKEN).explode().dropna()
+
+
+def _within_distance(a, b, limit):
+    """Levenshtein(a, b) <= limit, parando assim que a linha passa do limite."""
+    if abs(len(a) - len(b)) > limit:
+        return False
+    previous = list(range(len(b) + 1))
+    for i, char in enumerate(a, 1):
+        current = [i]
+        for j, other in enumerate(b, 1):
+            current.append(min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + (char != other)))
+        if min(current) > limit:
+            return False
+        previous = current
+    return previous[-1] <= limit
+
+
+class SearchIndex:
+    """Índice invertido palavra -> linhas dos ``fields`` + trigramas do vocabulário."""
+
+    def __init__(self, df, fields=FIELDS):
+        self.n_rows = len(df)
+
+        # Pares (linha, palavra, peso do campo), processando cada texto distinto uma vez
+        rows, words, weights = [], [], []
+        for field, weight in fields.items():
+            codes, uniques = pd.factorize(df[field])
+            tokens = _tokenize_all(uniques)
+            value = tokens.index.to_numpy()
+            counts = np.bincount(codes[codes >= 0], minlength=len(uniques))
+            order = np.argsort(codes, kind='stable')
+            starts = np.concatenate([[0], np.cumsum(counts)]) + (codes < 0).sum()
+            per_token = counts[value]
+            first = np.repeat(np.cumsum(per_token) - per_token, per_token)
+            within = np.arange(per_token.sum()) - first
+            rows.append(order[np.repeat(starts[value], per_token) + within])
+            words.append(np.repeat(tokens.to_numpy(), per_token))
+            weights.append(np.full(per_token.sum(), weight, dtype='int64'))
+        rows, words, weights = np.concatenate(rows), np.concatenate(words), np.concatenate(weights)
+
+        self.vocabulary = sorted(set(words))
+        tokens = pd.Index(self.vocabulary).get_indexer(words).astype('int64')
+        del words
+
+        # Uma posting por (palavra, linha), com o maior peso entre os campos
+        keys = (tokens * self.n_rows + rows) * 8 + weights
+        keys.sort()
+        keys, weights = keys // 8, keys % 8
+        last = np.r_[keys[1:] != keys[:-1], True]
+        keys, weights = keys[last], weights[last]
+        self.postings = (keys % self.n_rows).astype('int32' if self.n_rows < 2**31 else 'int64')
+        self.weights = weights.astype('uint8')
+        counts = np.bincount(keys // self.n_rows, minlength=len(self.vocabulary))
+        self.offsets = np.concatenate([[0], np.cumsum(counts)])
+        del keys
+
+        self._build_trigrams()
+
+        # Posição de cada linha pela nota e pelos votos, para desempatar
+        order = np.lexsort((df['restaurant_id'].to_numpy(), -df['votes'].to_numpy(),
+                            -df['aggregate_rating'].to_numpy()))
+        self.rank_position = np.empty(self.n_rows, dtype='int64')
+        self.rank_position[order] = np.arange(self.n_rows)
+
+        self._terms = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __getstate__(self):
+        # O cache e o lock são do processo: não vão junto (zomato.shared)
+        state = dict(self.__dict__, _terms=OrderedDict())
+        del state['_lock']
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state, _lock=threading.Lock())
+
+    def _build_trigrams(self):
+        padded = pd.Series(self.vocabulary, dtype=object).radd('$').add('$')
+        self.lengths = padded.str.len().to_numpy() - 2
+        ids, grams = [], []
+        start = 0
+        while len(padded):
+            padded = padded[padded.str.len() >= start + 3]
+            ids.append(padded.index.to_numpy())
+            grams.append(padded.str[start:start + 3].to_numpy())
+            start += 1
+        ids, grams = np.concatenate(ids), np.concatenate(grams)
+        codes, uniques = pd.factorize(grams)
+        order = np.argsort(codes, kind='stable')
+        self.gram_tokens = ids[order].astype('int64')
+        bounds = np.concatenate([[0], np.cumsum(np.bincount(codes, minlength=len(uniques)))])
+        self.grams = {gram: (bounds[i], bounds[i + 1]) for i, gram in enumerate(uniques)}
+
+    def _fuzzy(self, term):
+        """Palavras do vocabulário a até 1 (ou 2) edições de ``term``."""
+        if len(term) < FUZZY_MIN_LENGTH:
+            return []
+        limit = 2 if len(term) >= FUZZY2_MIN_LENGTH else 1
+        padded = f'${term}$'
+        slices = [self.gram_tokens[slice(*self.grams[padded[i:i + 3]])]
+                  for i in range(len(term)) if padded[i:i + 3] in self.grams]
+        if not slices:
+            return []
+        # Cada edição destrói no máximo 3 trigramas
+        candidates, shared = np.unique(np.concatenate(slices), return_counts=True)
+        candidates = candidates[(shared >= len(term) - 3 * limit)
+                                & (np.abs(self.lengths[candidates] - len(term)) <= limit)]
+        return [token for token in candidates.tolist()
+                if _within_distance(term, self.vocabulary[token], limit)]
+
+    def _expand(self, term):
+        """Faixa [início, fim) das palavras com prefixo ``term`` e as aproximadas."""
+        with self._lock:
+            if term in self._terms:
+                self._terms.move_to_end(term)
+                return self._terms[term]
+
+        start = bisect_left(self.vocabulary, term)
+        exact = start < len(self.vocabulary) and self.vocabulary[start] == term
+        if len(term) >= PREFIX_MIN_LENGTH:
+            end = bisect_left(self.vocabulary, term + '\U0010ffff')
+        else:
+            end = start + exact
+        fuzzy = [token for token in self._fuzzy(term) if not start <= token < end]
+        expansion = (start, end, exact, fuzzy)
+
+        with self._lock:
+            self._terms[term] = expansion
+            while len(self._terms) > CACHE_SIZE:
+                self._terms.popitem(last=False)
+        return expansion
+
+    def term_scores(self, term):
+        """Pontuação de ``term`` em cada linha (0 = não casa).
+
+        Uma linha casada por várias palavras (ex.: "pizz" em "pizza" no nome
+        e "pizzeria" no endereço) fica com a maior pontuação entre elas:
+
+        >>> df = pd.DataFrame({'restaurant_id': [1, 2], 'restaurant_name': ['Pizza Place', 'Cafe'],
+        ...                    'locality_verbose': ['Centro', 'Centro'],
+        ...                    'address': ['Pizzeria Street', 'Pizza Street'],
+        ...                    'votes': [0, 0], 'aggregate_rating': [0.0, 0.0]})
+        >>> SearchIndex(df).term_scores('pizz').tolist()
+        [8, 2]
+        """
+        start, end, exact, fuzzy = self._expand(term)
+        scores = np.zeros(self.n_rows, dtype='uint8')
+        # Cada parte é uma fatia contínua de postings; a linha fica com o maior
+        # valor. A fatia do prefixo junta várias palavras e repete linhas: com
+        # scores[rows] = ... valeria a última escrita, não a maior
+        parts = [(self.offsets[token], self.offsets[token + 1], FUZZY) for token in fuzzy]
+        parts.append((self.offsets[start + exact], self.offsets[end], PREFIX))
+        if exact:
+            parts.append((self.offsets[start], self.offsets[start + 1], EXACT))
+        for begin, finish, quality in parts:
+            if finish > begin:
+                np.maximum.at(scores, self.postings[begin:finish], self.weights[begin:finish] * quality)
+        return scores
+
+    def search(self, query, limit=RESULT_LIMIT, mask=None):
+        """Posições das ``limit`` melhores linhas para ``query`` + as pontuações.
+
+        ``mask`` (booleana, uma posição por linha) restringe as linhas aceitas.
+        """
+        terms = list(dict.fromkeys(tokenize(query)))
+        if not terms:
+            return np.empty(0, dtype='int64'), np.empty(0, dtype='int64')
+        total = np.zeros(self.n_rows, dtype='int64')
+        matched = np.ones(self.n_rows, dtype=bool) if mask is None else mask.copy()
+        for term in terms:
+            scores = self.term_scores(term)
+            matched &= scores > 0
+            total += scores
+
+        rows = np.flatnonzero(matched)
+        key = self.rank_position[rows] - total[rows] * self.n_rows
+        if len(rows) > limit:
+            top = np.argpartition(key, limit - 1)[:limit]
+            rows, key = rows[top], key[top]
+        order = np.argsort(key, kind='stable')
+        return rows[order], total[rows[order]]
+
+
+def search_index(dataset):
+    """``SearchIndex`` do dataset, construído uma vez por versão."""
+    return dataset.derived("search_index", lambda d: SearchIndex(d.df))
+
+
+@current_only
+@lru_cache(maxsize=256)
+def _search(dataset, terms, countries, limit):
+    mask = None
+    positions = filter_index(dataset).rows(country=countries)
+    if positions is not None:
+        mask = np.zeros(len(dataset.df), dtype=bool)
+        mask[positions] = True
+    rows, scores = search_index(dataset).search(' '.join(terms), limit, mask)
+    result = dataset.df.iloc[rows][RESULT_COLUMNS]
+    # Categóricas como texto: a tabela não precisa levar o dicionário inteiro ao navegador
+    categories = [column for column in RESULT_COLUMNS if isinstance(result[column].dtype, pd.CategoricalDtype)]
+    return result.astype({column: str for column in categories}).assign(score=scores)
+
+
+on_reload(_search.cache_clear)
+
+
+@timed("search")
+def search_restaurants(dataset, query, countries=None, limit=RESULT_LIMIT):
+    """Restaurantes que casam com ``query`` (nome, bairro ou endereço) nos ``countries``.
+
+    Casa palavras exatas, prefixos e, em palavras mais longas, erros de
+    digitação. Ordem: pontuação, nota e votos.
+    """
+    countries = None if countries is None else tuple(sorted(countries))
+    return _search(dataset, tuple(tokenize(query)), countries, limit)
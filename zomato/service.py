@@ -0,0 +1,467 @@
+# ==============================================================================
+# SERVIÇO HTTP/JSON DAS CONSULTAS
+# ==============================================================================
+#
+# Expõe as consultas de zomato.queries (os números das páginas) por HTTP, para
+# outros clientes além do Streamlit. O processo carrega o dataset tratado uma
+# vez (zomato.loader) e responde com os índices e agregados já montados:
+#
+#   GET /health                     -> {"status": "ok", "version": ...}
+#   GET /queries                    -> consultas disponíveis e os parâmetros
+#   GET /queries/<nome>?<params>    -> resultado da consulta em JSON
+#
+# Listas (countries, cuisines) vão como parâmetros repetidos
+# (?countries=India&countries=Brazil); "countries=" sozinho é a lista vazia.
+#
+# O servidor é asyncio puro (sem dependências), HTTP/1.1 com keep-alive. O
+# corpo de cada resposta é serializado uma vez e guardado em um LRU por
+# (versão do dataset, consulta, parâmetros canônicos); o ETag sai dessa mesma
+# chave, então um If-None-Match válido vira 304 sem tocar no cache. Só o
+# cálculo de uma consulta fora do cache vai para uma thread, e pedidos iguais
+# simultâneos esperam o mesmo cálculo.
+#
+#   python -m zomato.service --port 8600
+#   python -m zomato.service --port 8600 --workers 4
+#
+# Com --workers N, N processos atendem na mesma porta (SO_REUSEPORT, Linux) e
+# leem o dataset e os índices do store compartilhado (zomato.shared),
+# publicado uma vez antes de subirem.
+#
+# Com ZOMATO_API_URL=http://127.0.0.1:8600 as páginas buscam as consultas no
+# serviço (``fetch_query``) em vez de calculá-las no próprio processo.
+
+import argparse
+import asyncio
+import functools
+import hashlib
+import inspect
+import json
+import logging
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import OrderedDict
+from http import HTTPStatus
+from urllib.parse import parse_qs, urlencode, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from zomato.etl import CSV_PATH
+from zomato import queries
+from zomato.loader import WATCH_INTERVAL, is_stale, load_dataset, on_reload
+from zomato.queries import QUERIES, UNORDERED
+
+
+logger = logging.getLogger("zomato.service")
+
+HOST = "127.0.0.1"
+PORT = 8600
+
+# Respostas serializadas guardadas (todas as consultas juntas)
+CACHE_SIZE = 1024
+
+# Parâmetros que recebem listas
+LIST_PARAMS = ("countries", "cuisines")
+
+# Intervalo (s) entre as conferências do CSV: um pedido não paga o stat do arquivo
+CHECK_INTERVAL = 1.0
+
+# Tempo máximo de espera do cliente (s)
+TIMEOUT = 10
+
+# Limite da linha de pedido e de cada cabeçalho
+MAX_LINE = 8192
+
+# Nome do índice sem nome na serialização dos DataFrames
+UNNAMED_INDEX = "__index__"
+
+
+# ==============================================================================
+# SERIALIZAÇÃO DOS RESULTADOS
+# ==============================================================================
+
+def _plain(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    raise TypeError(f"tipo não serializável: {type(value).__name__}")
+
+
+def to_payload(result):
+    """Resultado de uma consulta em estruturas JSON.
+
+    DataFrames guardam o índice, as colunas e os dtypes, para que
+    ``from_payload`` devolva o mesmo frame do lado do cliente (as categóricas
+    voltam só com as categorias presentes).
+    """
+    if not isinstance(result, pd.DataFrame):
+        return result
+    index = [name or UNNAMED_INDEX for name in result.index.names]
+    frame = result.reset_index(names=index)
+    return {
+        "index": index,
+        "columns": list(frame.columns),
+        "dtypes": {column: str(dtype) for column, dtype in frame.dtypes.items()},
+        "data": frame.astype(object).where(frame.notna(), None).to_numpy().tolist(),
+    }
+
+
+def from_payload(payload):
+    """Inverso de ``to_payload``."""
+    if not (isinstance(payload, dict) and "dtypes" in payload and "data" in payload):
+        return payload
+    frame = pd.DataFrame(payload["data"], columns=payload["columns"]).astype(payload["dtypes"])
+    frame = frame.set_index(payload["index"])
+    frame.index.names = [None if name == UNNAMED_INDEX else name for name in frame.index.names]
+    return frame
+
+
+def encode(result):
+    return json.dumps(to_payload(result), default=_plain, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+# ==============================================================================
+# PARÂMETROS
+# ==============================================================================
+
+def _boolean(value):
+    if value.lower() in ("1", "true", "yes", "sim"):
+        return True
+    if value.lower() in ("0", "false", "no", "nao", "não"):
+        return False
+    raise ValueError(f"booleano inválido: {value!r}")
+
+
+@functools.lru_cache(maxsize=None)
+def query_params(func):
+    """Parâmetros da consulta (sem o dataset) e os valores padrão."""
+    parameters = list(inspect.signature(func).parameters.values())[1:]
+    return {parameter.name: parameter.default for parameter in parameters}
+
+
+def parse_params(func, query_string):
+    """Argumentos de ``func`` a partir da query string, na forma canônica.
+
+    Devolve uma tupla ordenada de (nome, valor), que também é a chave do
+    cache; listas viram tuplas (ordenadas nos parâmetros de ``UNORDERED``).
+    Levanta ``ValueError`` para parâmetros desconhecidos ou inválidos.
+    """
+    defaults = query_params(func)
+    params = {}
+    for name, values in parse_qs(query_string, keep_blank_values=True).items():
+        if name not in defaults:
+            raise ValueError(f"parâmetro desconhecido: {name}")
+        if name in LIST_PARAMS:
+            values = tuple(value for value in values if value)
+            params[name] = tuple(sorted(values)) if name in UNORDERED else values
+        elif isinstance(defaults[name], bool):
+            params[name] = _boolean(values[-1])
+        elif isinstance(defaults[name], int):
+            params[name] = int(values[-1])
+        else:
+            params[name] = values[-1]
+    return tuple(sorted(params.items()))
+
+
+def query_string(params):
+    """Inverso de ``parse_params``: ``params`` (dict) em query string."""
+    items = []
+    for name, value in params.items():
+        if value is None:
+            continue
+        if name in LIST_PARAMS:
+            items.extend((name, item) for item in value or [""])
+        elif isinstance(value, bool):
+            items.append((name, "true" if value else "false"))
+        else:
+            items.append((name, value))
+    return urlencode(items)
+
+
+# ==============================================================================
+# SERVIDOR
+# ==============================================================================
+
+class Response:
+    __slots__ = ("status", "body", "headers")
+
+    def __init__(self, status, body=b"", headers=()):
+        self.status = status
+        self.body = body
+        self.headers = headers
+
+
+def _json_response(status, payload, headers=()):
+    return Response(status, json.dumps(payload, ensure_ascii=False).encode(), headers)
+
+
+class QueryService:
+    """Roteia os pedidos para as consultas, com o cache das respostas e ETags."""
+
+    def __init__(self, path=CSV_PATH, cache_size=CACHE_SIZE):
+        self.path = path
+        self.cache_size = cache_size
+        self.cache = OrderedDict()
+        self.targets = OrderedDict()
+        self.pending = {}
+        self.stats = {"requests": 0, "hits": 0, "misses": 0, "not_modified": 0, "errors": 0}
+        self._dataset = None
+        self._loading = None
+        self._next_check = 0.0
+
+    async def dataset(self):
+        """Dataset atual.
+
+        Com a recarga em segundo plano do zomato.loader, depois da primeira
+        carga é só pegar a versão atual (sem esperar nada). Sem ela, o CSV é
+        conferido no máximo a cada ``CHECK_INTERVAL``, em uma thread: enquanto
+        uma recarga roda, os pedidos seguem com o dataset anterior.
+        """
+        if self._dataset is None:
+            self._dataset = await asyncio.get_running_loop().run_in_executor(None, load_dataset, self.path)
+            self._next_check = time.monotonic() + CHECK_INTERVAL
+        elif WATCH_INTERVAL > 0:
+            self._dataset = load_dataset(self.path)
+        elif self._loading is None and time.monotonic() >= self._next_check:
+            self._loading = asyncio.get_running_loop().run_in_executor(None, load_dataset, self.path)
+            self._loading.add_done_callback(self._loaded)
+        return self._dataset
+
+    def _loaded(self, future):
+        self._loading = None
+        self._next_check = time.monotonic() + CHECK_INTERVAL
+        if future.exception() is not None:
+            logger.warning("falha ao recarregar o dataset: %s", future.exception())
+        else:
+            self._dataset = future.result()
+
+    @staticmethod
+    def etag(key):
+        version, name, params = key
+        digest = hashlib.blake2b(repr((name, params)).encode(), digest_size=8).hexdigest()
+        return f'"{version}-{digest}"'
+
+    def route(self, target):
+        """(nome, consulta, parâmetros canônicos) de ``/queries/<nome>?...``.
+
+        Levanta ``LookupError`` (404) ou ``ValueError`` (400). Os alvos válidos
+        ficam memorizados: o mesmo pedido não é analisado de novo.
+        """
+        route = self.targets.get(target)
+        if route is not None:
+            return route
+        url = urlsplit(target)
+        name = url.path.rstrip("/")[len("/queries/"):]
+        func = QUERIES.get(name)
+        if func is None:
+            raise LookupError(f"consulta desconhecida: {name}")
+        route = (name, func, parse_params(func, url.query))
+        self.targets[target] = route
+        while len(self.targets) > self.cache_size:
+            self.targets.popitem(last=False)
+        return route
+
+    async def respond(self, method, target, if_none_match=None):
+        """Resposta a um pedido; ``target`` é o caminho com a query string."""
+        self.stats["requests"] += 1
+        if method not in ("GET", "HEAD"):
+            return _json_response(HTTPStatus.METHOD_NOT_ALLOWED, {"error": "use GET"}, (("Allow", "GET, HEAD"),))
+
+        if not target.startswith("/queries/"):
+            path = urlsplit(target).path.rstrip("/")
+            if path == "/health":
+                dataset = await self.dataset()
+                return _json_response(HTTPStatus.OK, {"status": "ok", "version": dataset.version})
+            if path == "/queries":
+                return _json_response(HTTPStatus.OK, {
+                    name: {"doc": inspect.getdoc(func), "params": query_params(func)} for name, func in QUERIES.items()
+                })
+            return _json_response(HTTPStatus.NOT_FOUND, {"error": f"rota desconhecida: {path}"})
+
+        try:
+            name, func, params = self.route(target)
+        except LookupError as error:
+            return _json_response(HTTPStatus.NOT_FOUND, {"error": str(error)})
+        except ValueError as error:
+            return _json_response(HTTPStatus.BAD_REQUEST, {"error": str(error)})
+
+        dataset = await self.dataset()
+        key = (dataset.version, name, params)
+        cached = self.cache.get(key)
+        if cached is not None:
+            self.cache.move_to_end(key)
+            etag, body = cached
+        else:
+            etag = self.etag(key)
+        headers = (("ETag", etag), ("Cache-Control", "no-cache"))
+        if if_none_match is not None and etag in (tag.strip() for tag in if_none_match.split(",")):
+            self.stats["not_modified"] += 1
+            return Response(HTTPStatus.NOT_MODIFIED, b"", headers)
+
+        if cached is not None:
+            self.stats["hits"] += 1
+        else:
+            try:
+                body = await self._compute(dataset, key, func)
+            except (KeyError, ValueError, TypeError) as error:
+                return _json_response(HTTPStatus.BAD_REQUEST, {"error": f"{type(error).__name__}: {error}"})
+        return Response(HTTPStatus.OK, body, headers)
+
+    async def _compute(self, dataset, key, func):
+        # Pedidos iguais simultâneos aguardam o mesmo cálculo
+        future = self.pending.get(key)
+        if future is not None:
+            return await asyncio.shield(future)
+        self.stats["misses"] += 1
+        params = dict(key[2])
+        future = asyncio.get_running_loop().run_in_executor(None, lambda: encode(func(dataset, **params)))
+        self.pending[key] = future
+        try:
+            body = await future
+        finally:
+            del self.pending[key]
+        if is_stale(dataset):  # versão já substituída: não volta ao cache
+            return body
+        self.cache[key] = (self.etag(key), body)
+        while len(self.cache) > self.cache_size:
+            self.cache.popitem(last=False)
+        return body
+
+    async def connection(self, reader, writer):
+        """Atende os pedidos de uma conexão (keep-alive) até o cliente fechar."""
+        try:
+            while True:
+                line = await reader.readline()
+                if not line:
+                    break
+                if len(line) > MAX_LINE:
+                    break
+                method, target, version = line.decode("latin-1").split()
+                headers = {}
+                while True:
+                    header = await reader.readline()
+                    if header in (b"\r\n", b"\n", b""):
+                        break
+                    field, _, value = header.decode("latin-1").partition(":")
+                    headers[field.strip().lower()] = value.strip()
+                # Corpo de um pedido não-GET: descartado
+                length = int(headers.get("content-length") or 0)
+                if length:
+                    await reader.readexactly(length)
+
+                connection = headers.get("connection", "").lower()
+                keep_alive = connection != "close" if version == "HTTP/1.1" else connection == "keep-alive"
+                try:
+                    response = await self.respond(method, target, headers.get("if-none-match"))
+                except Exception:  # falha inesperada (consulta, carga do dataset): 500, a conexão segue
+                    logger.exception("erro em %s %s", method, target)
+                    self.stats["errors"] += 1
+                    response = _json_response(HTTPStatus.INTERNAL_SERVER_ERROR, {"error": "erro interno"})
+                writer.write(self._head(response, keep_alive))
+                if method != "HEAD":
+                    writer.write(response.body)
+                await writer.drain()
+                if not keep_alive:
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError, ValueError, UnicodeDecodeError):
+            pass
+        finally:
+            writer.close()
+
+    @staticmethod
+    def _head(response, keep_alive):
+        status = HTTPStatus(response.status)
+        lines = [f"HTTP/1.1 {status.value} {status.phrase}"]
+        if status != HTTPStatus.NOT_MODIFIED:
+            lines.append("Content-Type: application/json; charset=utf-8")
+            lines.append(f"Content-Length: {len(response.body)}")
+        lines.extend(f"{field}: {value}" for field, value in response.headers)
+        lines.append("Connection: keep-alive" if keep_alive else "Connection: close")
+        return ("\r\n".join(lines) + "\r\n\r\n").encode("latin-1")
+
+
+async def serve(host=HOST, port=PORT, path=CSV_PATH, reuse_port=False):
+    """Carrega o dataset, monta os índices e atende em ``host:port`` até ser cancelado.
+
+    ``reuse_port`` deixa outros processos atenderem na mesma porta.
+    """
+    # O serviço sempre calcula as consultas (ZOMATO_API_URL não vale aqui)
+    queries.API_URL = None
+    service = QueryService(path)
+    loop = asyncio.get_running_loop()
+    # Recarga (thread do zomato.loader): as respostas da versão anterior saem do
+    # cache, no próprio loop, que é quem mexe nele
+    on_reload(lambda: loop.call_soon_threadsafe(service.cache.clear))
+    # Carga e índices antes de aceitar conexões: o primeiro pedido já é rápido
+    dataset = await service.dataset()
+    await loop.run_in_executor(None, lambda: [QUERIES[name](dataset) for name in QUERIES])
+    server = await asyncio.start_server(service.connection, host, port, limit=MAX_LINE * 2,
+                                        reuse_port=reuse_port or None)
+    logger.info("serviço de consultas em http://%s:%s (dataset %s)", host, port, dataset.version)
+    async with server:
+        await server.serve_forever()
+
+
+# ==============================================================================
+# CLIENTE (PÁGINAS)
+# ==============================================================================
+
+_responses = OrderedDict()
+_responses_lock = threading.Lock()
+
+
+def fetch_query(base_url, name, params, timeout=TIMEOUT):
+    """Resultado da consulta ``name`` no serviço em ``base_url``.
+
+    Guarda a última resposta de cada URL e revalida com If-None-Match: se o
+    dataset do serviço não mudou, a resposta é um 304 sem corpo.
+    """
+    url = f"{base_url.rstrip('/')}/queries/{name}?{query_string(params)}"
+    request = urllib.request.Request(url)
+    with _responses_lock:
+        cached = _responses.get(url)
+    if cached is not None:
+        request.add_header("If-None-Match", cached[0])
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            etag, body = response.headers.get("ETag"), response.read()
+    except urllib.error.HTTPError as error:
+        if error.code != HTTPStatus.NOT_MODIFIED or cached is None:
+            raise
+        return from_payload(json.loads(cached[1]))
+
+    with _responses_lock:
+        _responses[url] = (etag, body)
+        while len(_responses) > CACHE_SIZE:
+            _responses.popitem(last=False)
+    return from_payload(json.loads(body))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Serviço HTTP/JSON das consultas do dashboard.")
+    parser.add_argument("--host", default=HOST)
+    parser.add_argument("--port", type=int, default=PORT)
+    parser.add_argument("--csv", default=str(CSV_PATH), help="CSV da base (padrão: datasets/zomato.csv)")
+    parser.add_argument("--workers", type=int, default=1, help="processos atendendo na mesma porta")
+    parser.add_argument("--reuse-port", action="store_true", help=argparse.SUPPRESS)  # modo worker
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(message)s")
+
+    if args.workers > 1:
+        from zomato import shared
+        directory = shared.SHARED_DIR or shared.default_directory()
+        shared.ensure_published(args.csv, directory)
+        worker = [sys.executable, "-m", "zomato.service", "--host", args.host, "--port", str(args.port),
+                  "--csv", args.csv, "--reuse-port"]
+        shared.run_processes([worker] * args.workers, directory, args.csv)
+        return
+    try:
+        asyncio.run(serve(args.host, args.port, args.csv, args.reuse_port))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+# ==============================================================================
+# DATASET COMPARTILHADO ENTRE PROCESSOS
+# ==============================================================================
+#
+# Com vários processos servindo o app (várias instâncias do Streamlit atrás de
+# um balanceador, ou ``python -m zomato.service --workers N``), cada um
+# mapearia o snapshot, copiaria os textos para objetos Python e reconstruiria
+# todos os índices (busca, cubos, filtros, grades...): memória e tempo de
+# partida multiplicados pelo número de processos.
+#
+# Com ZOMATO_SHARED_DIR definida (ex.: /dev/shm/zomato, em memória
+# compartilhada; em outra pasta vira um arquivo mapeado):
+#
+#   - um único processo (``python -m zomato.shared``, ou o primeiro que
+#     precisar, sob um lock de arquivo) monta o dataset e todos os índices
+#     derivados e publica um "store" em <pasta>/<store>/: o estado em pickle
+#     (protocolo 5) com os arrays fora da banda, gravados alinhados em
+#     buffers.bin. Os textos viram categóricas de strings Arrow, também fora
+#     da banda;
+#   - os outros processos mapeiam buffers.bin e desserializam só o esqueleto:
+#     arrays do numpy/pandas e textos apontam direto para o mapa, somente
+#     leitura, e as páginas de memória são as mesmas em todos. Só estruturas
+#     Python pequenas (dicionários, vocabulário da busca, categorias) são
+#     copiadas em cada processo;
+#   - <pasta>/CURRENT diz qual store vale: os metadados do snapshot
+#     (zomato.snapshot) + a assinatura do código, trocado com os.replace.
+#
+#   python -m zomato.shared                          # só publica
+#   python -m zomato.shared --workers 4 --port 8501  # publica e sobe 4 Streamlits
+
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import pickle
+import shutil
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from functools import lru_cache
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from zomato.cube import aggregate_cube, cuisine_cube
+from zomato.cuisines import cuisine_index
+from zomato.etl import CSV_PATH, Dataset
+from zomato.filters import filter_index
+from zomato.geo import geo_index
+from zomato.loader import SHARED_DIR
+from zomato.profiling import stage
+from zomato.ranking import ranked
+from zomato.search import search_index
+from zomato.snapshot import is_fresh, load_or_build, snapshot_metadata, source_key
+from zomato.spatial import grid_index
+
+try:
+    import fcntl
+except ImportError:  # Windows: sem lock entre processos, publique antes com python -m zomato.shared
+    fcntl = None
+
+
+CURRENT = "CURRENT"
+LOCK = ".lock"
+
+# Alinhamento (bytes) de cada array em buffers.bin
+ALIGNMENT = 64
+
+# Stores mantidos na pasta (o atual e os anteriores, ainda mapeados por quem os usa)
+KEEP_STORES = 2
+
+# Índices e agregados publicados junto com o dataset
+DERIVED = (cuisine_index, filter_index, search_index, aggregate_cube, cuisine_cube, ranked, grid_index, geo_index)
+
+# Primeira porta do Streamlit no modo com vários processos
+PORT = 8501
+
+APP = Path(__file__).resolve().parent.parent / "1_visao_geral.py"
+
+try:
+    TEXT_DTYPE = pd.StringDtype("pyarrow")
+except ImportError:  # sem pyarrow os textos ficam como objetos (copiados por processo)
+    TEXT_DTYPE = None
+
+
+def default_directory():
+    """/dev/shm/zomato quando existe memória compartilhada; senão uma pasta temporária."""
+    if Path("/dev/shm").is_dir():
+        return Path("/dev/shm/zomato")
+    return Path(tempfile.gettempdir()) / "zomato-shared"
+
+
+@lru_cache(maxsize=None)
+def code_version():
+    """Assinatura dos módulos do pacote: um store gravado por outro código não vale."""
+    digest = hashlib.blake2b(digest_size=8)
+    for path in sorted(Path(__file__).resolve().parent.glob("*.py")):
+        stat = path.stat()
+        digest.update(f"{path.name}:{stat.st_mtime_ns}:{stat.st_size}".encode())
+    return digest.hexdigest()
+
+
+def read_current(directory=SHARED_DIR):
+    """Metadados do store atual de ``directory`` (None se não houver)."""
+    try:
+        with open(Path(directory) / CURRENT, encoding="utf-8") as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def is_current(meta, csv_path=CSV_PATH, directory=SHARED_DIR):
+    """O store de ``meta`` corresponde ao CSV, à configuração e ao código atuais?"""
+    if not meta or meta.get("code") != code_version() or not is_fresh(meta, csv_path):
+        return False
+    return (Path(directory) / meta["store"]).is_dir()
+
+
+# ==============================================================================
+# PUBLICAÇÃO
+# ==============================================================================
+
+def _write_state(path, state):
+    buffers = []
+    data = pickle.dumps(state, protocol=5, buffer_callback=buffers.append)
+    spans = np.empty((len(buffers), 2), dtype="int64")
+    with open(path / "buffers.bin", "wb") as f:
+        for i, buffer in enumerate(buffers):
+            raw = buffer.raw()
+            f.write(bytes(-f.tell() % ALIGNMENT))
+            spans[i] = f.tell(), raw.nbytes
+            f.write(raw)
+    np.save(path / "buffers.npy", spans)
+    (path / "state.pkl").write_bytes(data)
+
+
+def _write_current(directory, meta):
+    tmp = directory / f".{CURRENT}.{os.getpid()}.tmp"
+    tmp.write_text(json.dumps(meta), encoding="utf-8")
+    os.replace(tmp, directory / CURRENT)
+
+
+def _cleanup(directory, current):
+    """Apaga os stores mais antigos (quem ainda os mapeia continua lendo até soltar)."""
+    stores = sorted((path for path in directory.iterdir() if path.is_dir() and not path.name.startswith(".")),
+                    key=lambda path: path.stat().st_mtime_ns, reverse=True)
+    for path in stores[KEEP_STORES:]:
+        if path.name != current:
+            shutil.rmtree(path, ignore_errors=True)
+
+
+def shared_text(column):
+    """Coluna de texto como categórica de strings Arrow.
+
+    Os textos distintos ficam em buffers Arrow (fora da banda no pickle,
+    compartilhados) e cada linha é só um código: filtrar o frame copia
+    códigos, não os textos.
+    """
+    codes, uniques = pd.factorize(column)
+    categories = pd.Index(uniques, dtype=TEXT_DTYPE)
+    return pd.Series(pd.Categorical.from_codes(codes, dtype=pd.CategoricalDtype(categories)),
+                     index=column.index, name=column.name)
+
+
+def build_shared(csv_path=CSV_PATH):
+    """Dataset de ``csv_path`` no formato publicado, com todos os ``DERIVED`` construídos."""
+    dataset = load_or_build(csv_path)
+    df = dataset.df
+    if TEXT_DTYPE is not None:
+        df = df.assign(**{column: shared_text(df[column]) for column in df.columns if df[column].dtype == object})
+    dataset = Dataset(df, dataset.version, dataset.source, dataset.timings, dataset.reports,
+                      source_key=dataset.source_key)
+    for build in DERIVED:
+        build(dataset)
+    return dataset
+
+
+def publish(csv_path=CSV_PATH, directory=SHARED_DIR, dataset=None):
+    """Grava um novo store de ``csv_path`` (ou do ``dataset`` já montado por
+    ``build_shared``) em ``directory`` e o torna o atual. Devolve os metadados."""
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    with stage("publish-shared"):
+        dataset = dataset or build_shared(csv_path)
+        store = f"{dataset.version}-{time.time_ns():x}"
+        tmp = directory / f".{store}.{os.getpid()}.tmp"
+        tmp.mkdir()
+        _write_state(tmp, {"df": dataset.df, "derived": dataset.derived_state()})
+        os.replace(tmp, directory / store)
+
+        meta = json.loads(snapshot_metadata(dataset.source_key, dataset.version, dataset.reports))
+        meta.update(store=store, code=code_version(), source=str(csv_path))
+        _write_current(directory, meta)
+    _cleanup(directory, store)
+    return meta
+
+
+_publish_lock = threading.Lock()
+
+
+def ensure_published(csv_path=CSV_PATH, directory=SHARED_DIR):
+    """Metadados do store atual, publicando antes se ele não existe ou está velho.
+
+    Só um processo publica: os outros esperam o lock e encontram o store novo.
+    """
+    meta = read_current(directory)
+    if is_current(meta, csv_path, directory):
+        return meta
+    directory = Path(directory)
+    directory.mkdir(parents=True, exist_ok=True)
+    with _publish_lock, open(directory / LOCK, "a") as lock:
+        if fcntl is not None:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+        meta = read_current(directory)
+        if not is_current(meta, csv_path, directory):
+            meta = publish(csv_path, directory)
+    return meta
+
+
+# ==============================================================================
+# LEITURA (PROCESSOS QUE SÓ CONSOMEM)
+# ==============================================================================
+
+def attach(meta, csv_path=CSV_PATH, directory=SHARED_DIR):
+    """Mapeia o store de ``meta`` e devolve o ``Dataset`` (somente leitura)."""
+    store = Path(directory) / meta["store"]
+    with stage("attach-shared") as record:
+        spans = np.load(store / "buffers.npy")
+        with open(store / "buffers.bin", "rb") as f:
+            mapped = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if len(spans) else b""
+        view = memoryview(mapped)
+        state = pickle.loads((store / "state.pkl").read_bytes(),
+                             buffers=[view[start:start + size] for start, size in spans.tolist()])
+    timings = {"attach_shared": record["seconds"]}
+    return Dataset(state["df"], meta["version"], str(csv_path), timings, meta.get("reports"),
+                   derived_state=state["derived"], source_key=source_key(meta, csv_path))
+
+
+_attached = {}
+_attach_lock = threading.Lock()
+
+
+def load_shared(csv_path=CSV_PATH, directory=SHARED_DIR):
+    """``Dataset`` de ``csv_path`` a partir do store atual de ``directory``.
+
+    O store é mapeado uma vez por processo; um CSV alterado (ou um código
+    novo) gera um novo store, publicado por um único processo.
+    """
+    meta = ensure_published(csv_path, directory)
+    key = (str(directory), meta["store"])
+    dataset = _attached.get(key)
+    if dataset is None:
+        with _attach_lock:
+            dataset = _attached.get(key)
+            if dataset is None:
+                dataset = attach(meta, csv_path, directory)
+                for old in [old for old in _attached if old[0] == key[0]]:
+                    del _attached[old]  # quem ainda usa o anterior mantém o mapa vivo
+                _attached[key] = dataset
+    return dataset
+
+
+# ==============================================================================
+# VÁRIOS PROCESSOS
+# ==============================================================================
+
+def run_processes(commands, directory, csv_path=CSV_PATH):
+    """Roda ``commands`` (listas de argumentos) lendo ``csv_path`` pelo dataset
+    compartilhado em ``directory`` e espera todos terminarem; Ctrl+C encerra todos."""
+    env = dict(os.environ, ZOMATO_SHARED_DIR=str(directory), ZOMATO_CSV=str(csv_path))
+    processes = [subprocess.Popen(command, env=env) for command in commands]
+    try:
+        for process in processes:
+            process.wait()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for process in processes:
+            process.terminate()
+        for process in processes:
+            process.wait()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Publica o dataset compartilhado e sobe as instâncias do Streamlit.")
+    parser.add_argument("--csv", default=str(CSV_PATH), help="CSV da base (padrão: datasets/zomato.csv)")
+    parser.add_argument("--dir", default=SHARED_DIR or str(default_directory()), help="pasta do dataset compartilhado")
+    parser.add_argument("--workers", type=int, default=0, help="instâncias do Streamlit (0: só publica)")
+    parser.add_argument("--port", type=int, default=PORT, help="porta da primeira instância (as demais seguem)")
+    args = parser.parse_args(argv)
+
+    meta = ensure_published(args.csv, args.dir)
+    print(f"{Path(args.dir) / meta['store']}: versão {meta['version']}")
+    if args.workers:
+        run_processes([[sys.executable, "-m", "streamlit", "run", str(APP), "--server.headless", "true",
+                        "--server.port", str(args.port + i)] for i in range(args.workers)], args.dir, args.csv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,149 @@
+# ==============================================================================
+# SNAPSHOT BINÁRIO DO DATASET TRATADO
+# ==============================================================================
+#
+# O DataFrame já tratado é gravado em formato Arrow IPC (Feather v2) ao lado do
+# CSV. Na inicialização o arquivo é mapeado em memória em vez de fazer o parse
+# do CSV e repetir a limpeza. O snapshot guarda o mtime/tamanho do CSV de
+# origem e é reconstruído automaticamente quando o CSV muda (ou a política de
+# duplicadas, ou a versão da tabela de câmbio).
+#
+# Gerar manualmente:  python -m zomato.snapshot [caminho/do/arquivo.csv]
+
+import json
+import os
+import sys
+from pathlib import Path
+
+from zomato.currency import rates_version
+from zomato.etl import CSV_PATH, DEDUPE_POLICY, Dataset, build_dataset, file_key
+from zomato.profiling import stage
+
+try:
+    import pyarrow as pa
+    import pyarrow.feather as feather
+except ImportError:  # pyarrow vem com o streamlit, mas o pipeline funciona sem ele
+    pa = None
+
+# Incrementar sempre que o pipeline mudar o formato do DataFrame tratado
+SNAPSHOT_FORMAT = 6
+METADATA_KEY = b"zomato"
+
+# CSVs a partir deste tamanho são ingeridos em blocos (zomato.ingest)
+STREAM_THRESHOLD_BYTES = 256 * 1024 * 1024
+
+
+def snapshot_path(csv_path=CSV_PATH):
+    return Path(csv_path).with_suffix(".arrow")
+
+
+def snapshot_metadata(source_key, version, reports):
+    """Metadados (JSON) gravados no snapshot, ligando-o ao CSV de origem.
+
+    ``source_key`` é o ``file_key`` do CSV tomado antes de lê-lo, e a política
+    de duplicadas e a versão do câmbio vêm dos relatórios da construção, não
+    da configuração atual: um CSV ou uma tabela alterados no meio dela deixam
+    o snapshot velho.
+    """
+    _, mtime_ns, size = source_key
+    return json.dumps({
+        "format": SNAPSHOT_FORMAT,
+        "version": version,
+        "source_mtime_ns": mtime_ns,
+        "source_size": size,
+        "dedupe_policy": reports["dedupe"]["policy"],
+        "rates_version": reports["currency"]["rates_version"],
+        "reports": reports,
+    }).encode()
+
+
+def read_metadata(path):
+    """Lê apenas os metadados do snapshot (sem carregar as colunas)."""
+    with pa.memory_map(str(path)) as source:
+        schema = pa.ipc.open_file(source).schema
+    raw = (schema.metadata or {}).get(METADATA_KEY)
+    return json.loads(raw) if raw else None
+
+
+def source_key(meta, csv_path):
+    """``file_key`` do CSV de origem registrado nos metadados."""
+    return (str(Path(csv_path).resolve()), meta["source_mtime_ns"], meta["source_size"])
+
+
+def is_fresh(meta, csv_path):
+    if not meta or meta.get("format") != SNAPSHOT_FORMAT or meta.get("dedupe_policy") != DEDUPE_POLICY:
+        return False
+    if meta.get("rates_version") != rates_version():
+        return False
+    _, mtime_ns, size = file_key(csv_path)
+    return meta["source_mtime_ns"] == mtime_ns and meta["source_size"] == size
+
+
+def write_snapshot(dataset, csv_path=CSV_PATH, path=None):
+    """Grava o snapshot de forma atômica (arquivo temporário + rename)."""
+    path = Path(path or snapshot_path(csv_path))
+    table = pa.Table.from_pandas(dataset.df, preserve_index=False)
+    meta = dict(table.schema.metadata or {})
+    meta[METADATA_KEY] = snapshot_metadata(dataset.source_key, dataset.version, dataset.reports)
+    table = table.replace_schema_metadata(meta)
+
+    tmp = path.with_name(f".{path.name}.{os.getpid()}.tmp")
+    feather.write_feather(table, tmp, compression="uncompressed")
+    os.replace(tmp, path)
+    return path
+
+
+def read_snapshot(path, csv_path=CSV_PATH):
+    """Mapeia o snapshot em memória e devolve o ``Dataset``.
+
+    Sem compressão o Arrow lê os buffers direto do mmap; colunas numéricas
+    sem nulos chegam ao pandas sem cópia.
+    """
+    with stage("read_snapshot") as record:
+        table = pa.ipc.open_file(pa.memory_map(str(path))).read_all()
+        meta = json.loads(table.schema.metadata[METADATA_KEY])
+        df = table.to_pandas(split_blocks=True, self_destruct=True)
+    timings = {"read_snapshot": record["seconds"]}
+    return Dataset(df, meta["version"], str(csv_path), timings, meta.get("reports"),
+                   source_key=source_key(meta, csv_path))
+
+
+def load_or_build(csv_path=CSV_PATH):
+    """Carrega do snapshot se estiver atualizado; senão reconstrói e grava."""
+    if pa is None:
+        return build_dataset(csv_path)
+
+    path = snapshot_path(csv_path)
+    if path.exists():
+        try:
+            if is_fresh(read_metadata(path), csv_path):
+                return read_snapshot(path, csv_path)
+        except (OSError, pa.ArrowInvalid, KeyError, ValueError):
+            pass  # snapshot corrompido ou antigo: reconstrói abaixo
+
+    if file_key(csv_path)[2] >= STREAM_THRESHOLD_BYTES:
+        # CSV grande: snapshot gerado em blocos, sem o CSV inteiro em memória
+        from zomato.ingest import ingest_csv
+        try:
+            _, stats = ingest_csv(csv_path, path)
+        except OSError:
+            pass  # diretório somente leitura: constrói em memória abaixo
+        else:
+            dataset = read_snapshot(path, csv_path)
+            dataset.timings["ingest"] = stats["seconds"]
+            return dataset
+
+    dataset = build_dataset(csv_path)
+    with stage("write_snapshot") as record:
+        try:
+            write_snapshot(dataset, csv_path, path)
+        except OSError:
+            pass  # diretório somente leitura: segue com o dataset em memória
+    dataset.timings["write_snapshot"] = record["seconds"]
+    return dataset
+
+
+if __name__ == "__main__":
+    source = Path(sys.argv[1]) if len(sys.argv) > 1 else CSV_PATH
+    dataset = build_dataset(source)
+    print(f"{write_snapshot(dataset, source)}: {len(dataset.df)} linhas, versão {dataset.version}")
@@ -0,0 +1,125 @@
+# ==============================================================================
+# ÍNDICE ESPACIAL EM GRADE POR NÍVEL DE ZOOM
+# ==============================================================================
+#
+# Para cada nível de zoom do mapa os restaurantes são agregados em células de
+# uma grade de latitude/longitude (cerca de CELL_PIXELS pixels na tela). Cada
+# célula guarda contagem, somas de nota/coordenadas e contagem por cor, todas
+# aditivas, separadas por país. Assim o filtro de países é só uma soma das
+# células dos países escolhidos, e o mapa recebe apenas as células visíveis.
+
+import numpy as np
+import pandas as pd
+
+
+MIN_ZOOM = 0
+MAX_ZOOM = 14
+
+# Tamanho aproximado de uma célula na tela, em pixels (tile do leaflet = 256 px)
+CELL_PIXELS = 64
+
+
+def cell_size(zoom):
+    """Lado da célula, em graus, para o nível de ``zoom``."""
+    return 360 / 2 ** zoom * CELL_PIXELS / 256
+
+
+def normalize_bounds(bounds):
+    """Converte os bounds do leaflet em (sul, oeste, norte, leste) ou None."""
+    if not bounds:
+        return None
+    south_west, north_east = bounds.get("_southWest") or {}, bounds.get("_northEast") or {}
+    values = (south_west.get("lat"), south_west.get("lng"), north_east.get("lat"), north_east.get("lng"))
+    if any(value is None for value in values):
+        return None
+    return values
+
+
+def lon_mask(lon, west, east):
+    # O leaflet devolve longitudes fora de [-180, 180] quando o mapa dá a volta no globo
+    if east - west >= 360:
+        return np.ones(len(lon), dtype=bool)
+    west = (west + 180) % 360 - 180
+    east = (east + 180) % 360 - 180
+    if west <= east:
+        return (lon >= west) & (lon <= east)
+    return (lon >= west) | (lon <= east)
+
+
+class GridIndex:
+    """Agregados dos restaurantes por (país, célula) para cada nível de zoom."""
+
+    def __init__(self, df, min_zoom=MIN_ZOOM, max_zoom=MAX_ZOOM):
+        self.min_zoom = min_zoom
+        self.max_zoom = max_zoom
+
+        country = df['country'].astype('category')
+        color = df['color_name'].astype('category')
+        self.countries = list(country.cat.categories)
+        self.colors = list(color.cat.categories)
+
+        points = pd.DataFrame({
+            "country": country.cat.codes.to_numpy(),
+            "lat": df['latitude'].to_numpy(dtype='float64'),
+            "lon": df['longitude'].to_numpy(dtype='float64'),
+            "rating": df['aggregate_rating'].to_numpy(dtype='float64'),
+            "color": color.cat.codes.to_numpy(),
+        })
+
+        self.levels = {}
+        for zoom in range(min_zoom, max_zoom + 1):
+            size = cell_size(zoom)
+            points["ix"] = np.floor((points["lon"] + 180) / size).astype('int64')
+            points["iy"] = np.floor((points["lat"] + 90) / size).astype('int64')
+            keys = ["country", "ix", "iy"]
+            level = points.groupby(keys).agg(
+                count=("lat", "size"),
+                lat_sum=("lat", "sum"),
+                lon_sum=("lon", "sum"),
+                rating_sum=("rating", "sum"),
+            )
+            colors = points.groupby(keys + ["color"]).size().unstack(fill_value=0)
+            colors = colors.reindex(columns=range(len(self.colors)), fill_value=0)
+            self.levels[zoom] = level.join(colors).reset_index()
+
+    def query(self, zoom, bounds=None, countries=None):
+        """Células do nível ``zoom`` dentro de ``bounds`` somando os ``countries``.
+
+        Devolve um DataFrame com latitude/longitude (centroide dos
+        restaurantes), count, aggregate_rating (média) e color_name (cor mais
+        frequente na célula).
+        """
+        zoom = int(min(max(zoom, self.min_zoom), self.max_zoom))
+        level = self.levels[zoom]
+
+        mask = np.ones(len(level), dtype=bool)
+        if countries is not None:
+            codes = [self.countries.index(c) for c in countries if c in self.countries]
+            mask &= level["country"].isin(codes).to_numpy()
+        bounds = normalize_bounds(bounds)
+        if bounds is not None:
+            south, west, north, east = bounds
+            size = cell_size(zoom)
+            iy = level["iy"].to_numpy()
+            ix_lon = level["ix"].to_numpy() * size - 180
+            mask &= (iy >= np.floor((south + 90) / size)) & (iy <= np.floor((north + 90) / size))
+            mask &= lon_mask(ix_lon + size, west, east + size)
+
+        color_columns = list(range(len(self.colors)))
+        cells = level.loc[mask].drop(columns="country").groupby(["ix", "iy"]).sum()
+        if cells.empty:
+            return pd.DataFrame(columns=["latitude", "longitude", "count", "aggregate_rating", "color_name"])
+
+        dominant = cells[color_columns].to_numpy().argmax(axis=1)
+        return pd.DataFrame({
+            "latitude": cells["lat_sum"] / cells["count"],
+            "longitude": cells["lon_sum"] / cells["count"],
+            "count": cells["count"],
+            "aggregate_rating": (cells["rating_sum"] / cells["count"]).round(2),
+            "color_name": np.asarray(self.colors, dtype=object)[dominant],
+        }).reset_index(drop=True)
+
+
+def grid_index(dataset):
+    """``GridIndex`` do dataset, construído uma vez por versão."""
+    return dataset.derived("grid_index", lambda d: GridIndex(d.df))
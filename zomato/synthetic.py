@@ -0,0 +1,173 @@
+# ==============================================================================
+# GERADOR DE BASES SINTÉTICAS
+# ==============================================================================
+#
+# Aprende as distribuições do CSV original e gera bases de qualquer tamanho
+# no mesmo formato, para testes de carga. Cada atributo é sorteado da
+# distribuição observada, condicionada ao que a acopla na base real:
+#
+#   - cidade: pelo peso de cada cidade (o país e a moeda vêm junto);
+#   - bairro, endereço: de restaurantes da mesma cidade;
+#   - latitude/longitude: em torno do centro da cidade, com a dispersão real;
+#   - nome, culinárias (lista completa), flags: de restaurantes do mesmo país;
+#   - nota + cor + texto da nota (que varia de idioma por país): juntos, do
+#     mesmo país;
+#   - votos: de restaurantes com a mesma faixa de nota;
+#   - custo para dois + faixa de preço: juntos, da mesma moeda.
+#
+# A base é gerada em blocos: dezenas de milhões de linhas sem ter mais que
+# um bloco em memória.
+#
+# Uso:  python -m zomato.synthetic LINHAS saida.csv [--seed 42] [--chunk-rows 100000]
+
+import argparse
+import gzip
+import time
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+from zomato.etl import CSV_PATH
+
+
+CHUNK_ROWS = 100_000
+SEED = 42
+
+# Limites da dispersão (em graus) das coordenadas em torno do centro da cidade
+MIN_SPREAD = 0.005
+MAX_SPREAD = 0.1
+
+# Colunas sorteadas juntas, de um mesmo restaurante real
+CITY_COLUMNS = ["Country Code", "City", "Address", "Locality", "Locality Verbose", "Currency"]
+RATING_COLUMNS = ["Aggregate rating", "Rating color", "Rating text"]
+COST_COLUMNS = ["Average Cost for two", "Price range"]
+FLAG_COLUMNS = ["Has Table booking", "Has Online delivery", "Is delivering now", "Switch to order menu"]
+
+
+class _GroupSampler:
+    """Sorteia, para cada grupo pedido, uma linha da base pertencente a ele."""
+
+    def __init__(self, codes):
+        codes = np.asarray(codes)
+        self.order = np.argsort(codes, kind="stable")
+        self.counts = np.bincount(codes)
+        self.starts = np.concatenate([[0], np.cumsum(self.counts)[:-1]])
+
+    def __call__(self, groups, rng):
+        offsets = (rng.random(len(groups)) * self.counts[groups]).astype("int64")
+        return self.order[self.starts[groups] + offsets]
+
+
+class SyntheticModel:
+    """Distribuições aprendidas do CSV bruto (colunas originais)."""
+
+    def __init__(self, base):
+        self.base = base.reset_index(drop=True)
+        self.columns = list(base.columns)
+
+        self.city = self.base.groupby(["Country Code", "City"], sort=False).ngroup().to_numpy()
+        self.country, _ = pd.factorize(self.base["Country Code"])
+        self.currency, _ = pd.factorize(self.base["Currency"])
+        # Faixas de nota de 0.5 ponto, para acoplar votos à nota
+        self.rating_band = (self.base["Aggregate rating"].to_numpy() * 2).round().astype("int64")
+
+        counts = np.bincount(self.city)
+        self.city_weights = counts / counts.sum()
+        self.city_country = np.zeros(len(counts), dtype="int64")
+        self.city_country[self.city] = self.country
+
+        lat = self.base["Latitude"]
+        lon = self.base["Longitude"]
+        located = ~((lat == 0) & (lon == 0))
+        coords = pd.DataFrame({"city": self.city, "lat": lat, "lon": lon})[located]
+        grouped = coords.groupby("city")
+        self.center_lat = grouped["lat"].median().reindex(range(len(counts)), fill_value=0).to_numpy()
+        self.center_lon = grouped["lon"].median().reindex(range(len(counts)), fill_value=0).to_numpy()
+        self.spread_lat = _spread(grouped["lat"].std(), len(counts))
+        self.spread_lon = _spread(grouped["lon"].std(), len(counts))
+
+        self.by_city = _GroupSampler(self.city)
+        self.by_country = _GroupSampler(self.country)
+        self.by_currency = _GroupSampler(self.currency)
+        self.by_rating = _GroupSampler(self.rating_band)
+
+    def sample(self, rows, rng, first_id=1):
+        """DataFrame com ``rows`` restaurantes sintéticos no formato do CSV."""
+        base = self.base
+        city = rng.choice(len(self.city_weights), size=rows, p=self.city_weights)
+        country = self.city_country[city]
+
+        city_rows = self.by_city(city, rng)
+        rating_rows = self.by_country(country, rng)
+        out = {
+            "Restaurant ID": np.arange(first_id, first_id + rows, dtype="int64"),
+            "Restaurant Name": _take(base, "Restaurant Name", self.by_country(country, rng)),
+            "Latitude": self.center_lat[city] + rng.normal(0, 1, rows) * self.spread_lat[city],
+            "Longitude": self.center_lon[city] + rng.normal(0, 1, rows) * self.spread_lon[city],
+            "Cuisines": _take(base, "Cuisines", self.by_country(country, rng)),
+            "Votes": _take(base, "Votes", self.by_rating(self.rating_band[rating_rows], rng)),
+        }
+        for column in CITY_COLUMNS:
+            out[column] = _take(base, column, city_rows)
+        for column in RATING_COLUMNS:
+            out[column] = _take(base, column, rating_rows)
+        cost_rows = self.by_currency(self.currency[city_rows], rng)
+        for column in COST_COLUMNS:
+            out[column] = _take(base, column, cost_rows)
+        flag_rows = self.by_country(country, rng)
+        for column in FLAG_COLUMNS:
+            out[column] = _take(base, column, flag_rows)
+
+        df = pd.DataFrame(out)
+        df["Latitude"] = df["Latitude"].clip(-90, 90).round(10)
+        df["Longitude"] = ((df["Longitude"] + 180) % 360 - 180).round(10)
+        return df[self.columns]
+
+
+def _spread(std, size):
+    return std.reindex(range(size)).fillna(MIN_SPREAD).clip(MIN_SPREAD, MAX_SPREAD).to_numpy()
+
+
+def _take(df, column, rows):
+    return df[column].to_numpy()[rows]
+
+
+def fit(path=CSV_PATH):
+    """Aprende as distribuições do CSV bruto em ``path``."""
+    return SyntheticModel(pd.read_csv(path))
+
+
+def generate(rows, model=None, seed=SEED, chunk_rows=CHUNK_ROWS):
+    """Blocos (DataFrames) de até ``chunk_rows`` linhas, ``rows`` no total.
+
+    Os Restaurant ID são sequenciais e únicos entre os blocos.
+    """
+    model = model or fit()
+    rng = np.random.default_rng(seed)
+    for start in range(0, rows, chunk_rows):
+        yield model.sample(min(chunk_rows, rows - start), rng, first_id=start + 1)
+
+
+def write_csv(path, rows, model=None, seed=SEED, chunk_rows=CHUNK_ROWS):
+    """Grava a base sintética em ``path`` bloco a bloco (``.gz`` sai compactado)."""
+    path = Path(path)
+    opener = gzip.open if path.suffix == ".gz" else open
+    with opener(path, "wt", newline="", encoding="utf-8") as handle:
+        for i, chunk in enumerate(generate(rows, model, seed, chunk_rows)):
+            chunk.to_csv(handle, index=False, header=i == 0)
+    return path
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Gera uma base sintética no formato do zomato.csv.")
+    parser.add_argument("rows", type=int)
+    parser.add_argument("output")
+    parser.add_argument("--source", default=CSV_PATH, help="CSV de onde aprender as distribuições")
+    parser.add_argument("--seed", type=int, default=SEED)
+    parser.add_argument("--chunk-rows", type=int, default=CHUNK_ROWS)
+    args = parser.parse_args()
+
+    start = time.perf_counter()
+    write_csv(args.output, args.rows, fit(args.source), args.seed, args.chunk_rows)
+    print(f"{args.output}: {args.rows} linhas em {time.perf_counter() - start:.1f}s")
@@ -0,0 +1,171 @@
+# ==============================================================================
+# COMPONENTES DE TELA COMPARTILHADOS PELAS PÁGINAS
+# ==============================================================================
+
+import json
+import os
+import threading
+import time
+from contextlib import ExitStack, contextmanager
+
+import pandas as pd
+import plotly.graph_objects as go
+import streamlit as st
+
+from zomato import loader, profiling, queries
+from zomato.currency import COST_UNITS
+from zomato.export import FORMATS, available_formats, cached_export, export_bytes
+
+try:
+    from streamlit.proto.PlotlyChart_pb2 import PlotlyChart as PlotlyChartProto
+except ImportError:
+    PlotlyChartProto = None
+
+
+# Chave do session_state que pede o perfil da próxima execução
+PROFILE_KEY = "_zomato_profile"
+
+# Chave do session_state com o último perfil, até o painel mostrá-lo
+PROFILE_REPORT_KEY = "_zomato_profile_report"
+
+# Execução aberta nesta thread de script (ver ``start_run``)
+_open = threading.local()
+
+
+def download_sidebar(dataset, paises):
+    """Seção 'Dados Tratados': gera o arquivo só quando o usuário pede."""
+    st.sidebar.markdown('## Dados Tratados')
+
+    formato = st.sidebar.selectbox('Formato do arquivo', available_formats(),
+                                   format_func=lambda nome: FORMATS[nome]['label'])
+
+    arquivo = cached_export(dataset, paises, formato)
+    if arquivo is None and st.sidebar.button('Preparar download'):
+        arquivo = export_bytes(dataset, paises, formato)
+
+    if arquivo is not None:
+        st.sidebar.download_button(
+            label="Download",
+            data=arquivo,
+            file_name=FORMATS[formato]['file_name'],
+            mime=FORMATS[formato]['mime'])
+
+
+def cost_unit_sidebar():
+    """Unidade dos preços nos gráficos e tabelas: 'usd' (padrão) ou 'local'."""
+    return st.sidebar.radio('Unidade dos preços', list(COST_UNITS), horizontal=True,
+                            format_func=lambda unidade: COST_UNITS[unidade]['label'])
+
+
+def plotly_json_chart(spec, use_container_width=True, container=None):
+    """Exibe uma figura Plotly já serializada em JSON (ver zomato.figures).
+
+    O st.plotly_chart converteria e serializaria a figura de novo a cada
+    rerun; aqui o JSON vai direto para a mensagem do Streamlit. Se a API
+    interna mudar (proto ou ``_enqueue``), cai no st.plotly_chart normal.
+    """
+    if PlotlyChartProto is not None:
+        try:
+            proto = PlotlyChartProto()
+            proto.use_container_width = use_container_width
+            proto.figure.spec = spec
+            proto.figure.config = json.dumps({"showLink": False, "linkText": False})
+            proto.theme = "streamlit"
+            # st._main respeita o contexto ativo (with col1: ...), como o st.plotly_chart
+            return (container or st._main)._enqueue("plotly_chart", proto)
+        except AttributeError:
+            pass
+    return (container or st).plotly_chart(go.Figure(json.loads(spec)), use_container_width=use_container_width)
+
+
+# ==============================================================================
+# DIAGNÓSTICO (?debug=1 na URL ou ZOMATO_DEBUG=1)
+# ==============================================================================
+
+def debug_enabled():
+    if os.environ.get("ZOMATO_DEBUG"):
+        return True
+    return st.experimental_get_query_params().get("debug", ["0"])[0] not in ("", "0")
+
+
+def start_run(page):
+    """Começa a medir as etapas desta execução da página.
+
+    Se o painel de diagnóstico pediu, perfila esta execução inteira. Uma
+    execução anterior desta thread que ficou aberta é fechada antes.
+    """
+    finish_run(getattr(_open, "run", None))
+    profiling.configure_from_env()
+    profiling.begin_run(page)
+    run = {"page": page, "start": time.perf_counter(), "stack": ExitStack(), "profile": None,
+           "records": None, "total": None}
+    engine = st.session_state.pop(PROFILE_KEY, None)
+    if engine:
+        run["profile"] = run["stack"].enter_context(profiling.profile_run(engine))
+    _open.run = run
+    return run
+
+
+def finish_run(run):
+    """Fecha a medição (e o perfil) de ``run``; chamadas repetidas não fazem nada."""
+    if run is None or run["total"] is not None:
+        return
+    try:
+        run["stack"].close()
+    finally:
+        run["records"] = profiling.end_run()
+        run["total"] = time.perf_counter() - run["start"]
+        if getattr(_open, "run", None) is run:
+            _open.run = None
+    if run["profile"] is not None:
+        st.session_state[PROFILE_REPORT_KEY] = run["profile"]["report"]
+
+
+@contextmanager
+def page_run(page):
+    """Envolve o corpo da página: a medição é fechada mesmo quando a execução
+    termina antes do fim (st.experimental_rerun, st.stop ou um erro)."""
+    run = start_run(page)
+    try:
+        yield run
+    finally:
+        finish_run(run)
+
+
+def debug_panel(run, dataset=None):
+    """Chamado no fim da página: mostra o painel na barra lateral."""
+    finish_run(run)
+    records, total = run["records"], run["total"]
+    if not debug_enabled():
+        return
+
+    with st.sidebar.expander('Diagnóstico', expanded=True):
+        st.markdown(f'**Execução:** {total * 1000:.0f} ms')
+        if records:
+            etapas = pd.DataFrame(records)
+            etapas['ms'] = (etapas['seconds'] * 1000).round(1)
+            etapas['RSS (MB)'] = (etapas['rss_delta_bytes'] / 2**20).round(2)
+            st.dataframe(etapas[['stage', 'ms', 'RSS (MB)']], hide_index=True)
+
+        if dataset is not None:
+            st.markdown(f'**Dataset** {dataset.version} ({len(dataset.df)} linhas)')
+            carga = pd.Series(dataset.timings, name='ms').mul(1000).round(1)
+            st.dataframe(carga)
+            if dataset.reports:
+                st.json(dataset.reports, expanded=False)
+            st.markdown('**Recarga do dataset**')
+            st.json(loader.reload_status(), expanded=False)
+
+        engine = st.selectbox('Perfilador', profiling.profilers())
+        if st.button('Perfilar próxima execução'):
+            st.session_state[PROFILE_KEY] = engine
+            st.experimental_rerun()
+        # O perfil de uma execução interrompida (ex.: rerun) aparece na seguinte
+        report = st.session_state.pop(PROFILE_REPORT_KEY, None)
+        if report is not None:
+            st.code(report, language=None)
+
+        st.markdown('**Métricas do processo**')
+        st.json(profiling.metrics.snapshot()["stages"], expanded=False)
+        st.markdown('**Cache das consultas**')
+        st.json(queries.cache_info(), expanded=False)